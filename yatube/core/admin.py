@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'queue',
+        'task',
+        'status',
+        'attempts',
+        'run_at',
+    )
+    list_filter = ('queue', 'status')
+    search_fields = ('task', 'key')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,32 @@
+"""Запуск работы вне запроса."""
+import threading
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def threads_allowed(using=DEFAULT_DB_ALIAS):
+    """Можно ли обращаться к базе из другого потока.
+
+    Соединения к общей in-memory базе SQLite (так работают тесты)
+    блокируют таблицы друг друга, поэтому работу с ней выполняем в
+    текущем потоке.
+    """
+    is_in_memory_db = getattr(connections[using], 'is_in_memory_db', None)
+    return not (is_in_memory_db and is_in_memory_db())
+
+
+def _run_and_close(func, *args):
+    try:
+        func(*args)
+    finally:
+        connections.close_all()
+
+
+def run_in_thread(func, *args):
+    """Выполняет ``func`` в фоновом потоке, если это безопасно."""
+    if not threads_allowed():
+        func(*args)
+        return
+    threading.Thread(
+        target=_run_and_close, args=(func, *args), daemon=True
+    ).start()
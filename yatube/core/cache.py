@@ -0,0 +1,305 @@
+"""Двухуровневый кэш и защита от одновременного пересчёта.
+
+``TwoTierCache`` держит небольшой LRU-кэш в памяти процесса перед общим
+кэшем (например, ``FileBasedCache``), который видят все процессы. О
+записи и удалении ключа процесс пишет сообщение в журнал в общем кэше,
+остальные процессы читают журнал не чаще раза в ``SYNC_INTERVAL``
+секунд и выбрасывают эти ключи из своей памяти.
+
+``get_or_set`` пересчитывает значение одним процессом: остальные ждут
+его или отдают прежнее значение. Запись пересчитывается заранее с
+вероятностью, которая растёт к концу срока жизни (XFetch), поэтому
+ключи истекают не у всех процессов одновременно.
+"""
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.functional import cached_property
+
+FLIGHT_TIMEOUT = 30
+FLIGHT_POLL = 0.05
+
+# Значение из ``get_or_set`` со временем расчёта и моментом истечения.
+Computed = namedtuple('Computed', 'value delta expires')
+
+_MISSING = object()
+
+
+@contextmanager
+def single_flight(cache, key, timeout=FLIGHT_TIMEOUT, wait=True):
+    """Пропускает в блок один процесс или поток на ключ.
+
+    Возвращает, получен ли замок. Остальные с ``wait`` ждут, пока замок
+    освободится (но не дольше ``timeout``), и входят в блок без него:
+    к этому времени результат обычно уже в кэше.
+    """
+    lock_key = f'flight:{key}'
+    acquired = cache.add(lock_key, True, timeout)
+    if not acquired and wait:
+        deadline = time.monotonic() + timeout
+        while (
+            cache.get(lock_key) is not None
+            and time.monotonic() < deadline
+        ):
+            time.sleep(FLIGHT_POLL)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            cache.delete(lock_key)
+
+
+class TwoTierCache(BaseCache):
+    """Память процесса перед общим кэшем ``LOCATION``.
+
+    ``OPTIONS``: ``L1_MAX_ENTRIES`` и ``L1_TIMEOUT`` — размер и срок
+    жизни записей в памяти, ``SYNC_INTERVAL`` — как часто читать журнал
+    инвалидаций, ``EARLY_REFRESH_BETA`` — насколько рано пересчитывать
+    записи ``get_or_set`` (0 — не раньше истечения).
+
+    Журнал нумеруется через ``incr`` общего кэша. У ``FileBasedCache``
+    он не атомарен между процессами, и сообщение может потеряться;
+    тогда устаревшая запись живёт в памяти не дольше ``L1_TIMEOUT``.
+    """
+    seq_key = 'two_tier:seq'
+    log_prefix = 'two_tier:log'
+    log_timeout = 5 * 60
+    log_limit = 1000
+    flush = '*'
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = location
+        self.l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.sync_interval = options.get('SYNC_INTERVAL', 0.5)
+        self.beta = options.get('EARLY_REFRESH_BETA', 1.0)
+        self._l1 = OrderedDict()
+        self._lock = threading.RLock()
+        self._seen = None
+        self._synced_at = 0.0
+
+    @cached_property
+    def shared(self):
+        return caches[self.shared_alias]
+
+    # Память процесса.
+
+    def _l1_get(self, key):
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return _MISSING
+            pickled, expires = entry
+            if expires <= time.monotonic():
+                del self._l1[key]
+                return _MISSING
+            self._l1.move_to_end(key)
+        # Копия на каждое чтение: значение могут менять, как ответы
+        # из кэша страниц.
+        return pickle.loads(pickled)
+
+    def _l1_set(self, key, value, timeout):
+        lifetime = self.l1_timeout
+        if timeout is not None:
+            lifetime = min(lifetime, timeout)
+        if lifetime <= 0:
+            self._l1_delete(key)
+            return
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._l1[key] = (pickled, time.monotonic() + lifetime)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self.l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._l1.pop(key, None)
+
+    def _l1_clear(self):
+        with self._lock:
+            self._l1.clear()
+
+    # Журнал инвалидаций.
+
+    def _publish(self, *keys):
+        try:
+            last = self.shared.incr(self.seq_key, len(keys))
+        except ValueError:
+            self.shared.add(self.seq_key, 0, None)
+            last = self.shared.incr(self.seq_key, len(keys))
+        first = last - len(keys) + 1
+        self.shared.set_many({
+            f'{self.log_prefix}:{number}': key
+            for number, key in enumerate(keys, first)
+        }, self.log_timeout)
+
+    def _sync(self):
+        now = time.monotonic()
+        if now - self._synced_at < self.sync_interval:
+            return
+        self._synced_at = now
+        current = self.shared.get(self.seq_key) or 0
+        seen, self._seen = self._seen, current
+        if seen is None or current == seen:
+            return
+        if current < seen or current - seen > self.log_limit:
+            self._l1_clear()
+            return
+        wanted = [
+            f'{self.log_prefix}:{number}'
+            for number in range(seen + 1, current + 1)
+        ]
+        messages = self.shared.get_many(wanted)
+        # Пропавшее сообщение могло касаться любого ключа.
+        if len(messages) < len(wanted) or self.flush in messages.values():
+            self._l1_clear()
+            return
+        self._l1_delete(*messages.values())
+
+    # API кэша.
+
+    def _get_raw(self, key, version):
+        self._sync()
+        made = self.make_key(key, version)
+        value = self._l1_get(made)
+        if value is _MISSING:
+            value = self.shared.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                self._l1_set(made, value, self.l1_timeout)
+        return value
+
+    def get(self, key, default=None, version=None):
+        value = self._get_raw(key, version)
+        if value is _MISSING:
+            return default
+        if isinstance(value, Computed):
+            return value.value
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        made = self.make_key(key, version)
+        self._l1_set(made, value, self._lifetime(timeout))
+        self._publish(made)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        # Замки живут только в общем кэше: память процесса их не видит.
+        return self.shared.add(key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        self._l1_delete(self.make_key(key, version))
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        self.shared.delete(key, version=version)
+        made = self.make_key(key, version)
+        self._l1_delete(made)
+        self._publish(made)
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        made = self.make_key(key, version)
+        self._l1_delete(made)
+        self._publish(made)
+        return value
+
+    def has_key(self, key, version=None):
+        return self._get_raw(key, version) is not _MISSING
+
+    def get_many(self, keys, version=None):
+        self._sync()
+        found = {}
+        missing = []
+        for key in keys:
+            value = self._l1_get(self.make_key(key, version))
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            fetched = self.shared.get_many(missing, version=version)
+            for key, value in fetched.items():
+                self._l1_set(self.make_key(key, version), value, None)
+            found.update(fetched)
+        return {
+            key: value.value if isinstance(value, Computed) else value
+            for key, value in found.items()
+        }
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        made = []
+        for key, value in data.items():
+            made.append(self.make_key(key, version))
+            if key not in failed:
+                self._l1_set(made[-1], value, self._lifetime(timeout))
+        if made:
+            self._publish(*made)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        made = [self.make_key(key, version) for key in keys]
+        self._l1_delete(*made)
+        if made:
+            self._publish(*made)
+
+    def clear(self):
+        self.shared.clear()
+        self._l1_clear()
+        self._seen = None
+        self._publish(self.flush)
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def _lifetime(self, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            return self.default_timeout
+        return timeout
+
+    # Пересчёт без давки.
+
+    def should_refresh(self, entry):
+        """XFetch: пора ли пересчитать запись, не дожидаясь истечения."""
+        if entry.expires is None or not self.beta:
+            return False
+        jitter = -entry.delta * self.beta * math.log(random.random())
+        return time.time() + jitter >= entry.expires
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        entry = self._get_raw(key, version)
+        if entry is not _MISSING and not isinstance(entry, Computed):
+            return entry
+        if entry is not _MISSING and not self.should_refresh(entry):
+            return entry.value
+        flight_key = self.make_key(key, version)
+        # Прежнее значение ещё годно: его отдаём, пока другой считает.
+        with single_flight(
+            self.shared, flight_key, wait=entry is _MISSING
+        ) as acquired:
+            if not acquired:
+                if entry is not _MISSING:
+                    return entry.value
+                fresh = self.shared.get(key, _MISSING, version=version)
+                if isinstance(fresh, Computed):
+                    return fresh.value
+            started = time.time()
+            value = default() if callable(default) else default
+            delta = time.time() - started
+            lifetime = self._lifetime(timeout)
+            expires = None if lifetime is None else time.time() + lifetime
+            self.set(key, Computed(value, delta, expires), timeout, version)
+        return value
@@ -0,0 +1,221 @@
+"""Очередь отложенных задач в базе данных.
+
+Задача — обычная функция модуля. ``enqueue`` записывает её в таблицу
+``Job`` в текущей транзакции, поэтому воркер увидит задачу только вместе
+с данными, ради которых она поставлена. Воркер ``manage.py run_jobs``
+выполняет задачи в пуле потоков, не превышая лимит одновременных задач
+очереди из ``JOB_QUEUES``, и повторяет упавшие с экспоненциальной
+паузой.
+
+Если базу не видно из другого процесса (in-memory SQLite в тестах) или
+для разработки включён ``JOBS_EAGER``, задачи выполняются сразу при
+постановке. Упавшая при этом задача ставится в очередь, и её повторит
+воркер. Задачи с ``eager=False`` (например, миниатюры со страницы)
+всегда ждут воркера: рендеринг не должен выполнять медленную работу.
+"""
+import json
+import logging
+import random
+import time
+import traceback
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .background import threads_allowed
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task_path(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def is_eager():
+    return settings.JOBS_EAGER or not threads_allowed()
+
+
+def enqueue(task, *args, queue='default', key='', delay=0,
+            max_attempts=None, skip_failed=False, eager=True, **kwargs):
+    """Ставит ``task(*args, **kwargs)`` в очередь ``queue``.
+
+    Аргументы должны сериализоваться в JSON. Задача с непустым ``key``
+    не ставится, пока такая же ждёт или выполняется, а со
+    ``skip_failed`` — и если такая же исчерпала попытки. С
+    ``eager=False`` задача не выполняется на месте даже в режиме
+    немедленного выполнения.
+    """
+    path = task_path(task)
+    payload = json.dumps({'args': args, 'kwargs': kwargs})
+    attempts, error = 0, ''
+    if eager and is_eager():
+        error = _run_eagerly(path, payload)
+        if not error:
+            return None
+        # Первая попытка уже сделана: дальше задачу повторяет воркер.
+        attempts, delay = 1, backoff(1)
+    statuses = [Job.QUEUED, Job.RUNNING]
+    if skip_failed:
+        statuses.append(Job.FAILED)
+    if key and Job.objects.filter(key=key, status__in=statuses).exists():
+        return None
+    return Job.objects.create(
+        queue=queue,
+        task=path,
+        payload=payload,
+        key=key,
+        attempts=attempts,
+        last_error=error,
+        run_at=timezone.now() + timedelta(seconds=delay),
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+    )
+
+
+def _call(path, payload):
+    payload = json.loads(payload)
+    import_string(path)(*payload['args'], **payload['kwargs'])
+
+
+def _run_eagerly(path, payload):
+    """Выполняет задачу на месте; возвращает текст ошибки или ``''``."""
+    try:
+        _call(path, payload)
+    except Exception:
+        logger.exception('Задача %s завершилась ошибкой', path)
+        return traceback.format_exc()
+    return ''
+
+
+def backoff(attempts):
+    """Пауза перед повтором: удваивается с каждой попыткой, с разбросом."""
+    delay = min(
+        settings.JOB_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.JOB_RETRY_MAX_DELAY,
+    )
+    return delay * random.uniform(0.5, 1.5)
+
+
+def claim(queue, limit, capacity):
+    """Берёт готовые задачи очереди, не превышая её лимит.
+
+    Лимит общий для всех воркеров: учитываются задачи, которые уже
+    выполняются. Условный ``UPDATE`` гарантирует, что задачу возьмёт
+    только один воркер.
+    """
+    running = Job.objects.filter(queue=queue, status=Job.RUNNING).count()
+    free = min(limit - running, capacity)
+    if free <= 0:
+        return []
+    now = timezone.now()
+    candidates = Job.objects.filter(
+        queue=queue, status=Job.QUEUED, run_at__lte=now
+    ).order_by('run_at', 'pk').values_list('pk', flat=True)[:free]
+    claimed = []
+    for pk in list(candidates):
+        taken = Job.objects.filter(pk=pk, status=Job.QUEUED).update(
+            status=Job.RUNNING, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if taken:
+            claimed.append(pk)
+    return claimed
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи воркеров, которые перестали отвечать."""
+    deadline = timezone.now() - timedelta(seconds=settings.JOB_STALE_AFTER)
+    return Job.objects.filter(
+        status=Job.RUNNING, locked_at__lt=deadline
+    ).update(status=Job.QUEUED, locked_at=None)
+
+
+def execute(pk):
+    """Выполняет взятую задачу; возвращает ``True`` при успехе."""
+    job = Job.objects.get(pk=pk)
+    try:
+        _call(job.task, job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        failed = job.attempts >= job.max_attempts
+        Job.objects.filter(pk=pk).update(
+            status=Job.FAILED if failed else Job.QUEUED,
+            run_at=timezone.now() + timedelta(seconds=backoff(job.attempts)),
+            locked_at=None,
+            last_error=error,
+        )
+        logger.warning(
+            'Задача %s #%s, попытка %s: %s',
+            job.task, pk, job.attempts, error.splitlines()[-1],
+        )
+        return False
+    Job.objects.filter(pk=pk).delete()
+    return True
+
+
+def _execute_safely(pk):
+    try:
+        return execute(pk)
+    except Exception:
+        logger.exception('Не удалось выполнить задачу #%s', pk)
+        return False
+
+
+def _execute_in_thread(pk):
+    close_old_connections()
+    try:
+        return _execute_safely(pk)
+    finally:
+        connection.close()
+
+
+class Worker:
+    """Цикл выборки задач для пула из ``workers`` потоков."""
+
+    def __init__(self, queues, workers, poll=1.0):
+        self.queues = queues
+        self.workers = workers
+        self.poll = poll
+        self.processed = 0
+        self.failed = 0
+
+    def submit(self, pool, pk):
+        if threads_allowed():
+            return pool.submit(_execute_in_thread, pk)
+        future = Future()
+        future.set_result(_execute_safely(pk))
+        return future
+
+    def run(self, once=False):
+        """Работает до остановки; с ``once`` — пока есть готовые задачи."""
+        running = set()
+        with ThreadPoolExecutor(self.workers, 'jobs') as pool:
+            while True:
+                requeue_stale()
+                for queue, limit in self.queues.items():
+                    capacity = self.workers - len(running)
+                    for pk in claim(queue, limit, capacity):
+                        running.add(self.submit(pool, pk))
+                if not running:
+                    if once:
+                        return
+                    time.sleep(self.poll)
+                    continue
+                done, running = wait(
+                    running, timeout=self.poll, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    self.processed += 1
+                    if not future.result():
+                        self.failed += 1
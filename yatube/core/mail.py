@@ -0,0 +1,38 @@
+"""Отправка писем через очередь задач."""
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+
+from .jobs import enqueue
+
+
+def serialize(message):
+    return {
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+    }
+
+
+def deliver(data):
+    """Отправляет письмо настоящим бэкендом ``QUEUED_EMAIL_BACKEND``."""
+    connection = get_connection(settings.QUEUED_EMAIL_BACKEND)
+    connection.send_messages([EmailMultiAlternatives(**data)])
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """Ставит письма в очередь ``email`` вместо отправки в запросе.
+
+    Вложения не поддерживаются: письма сайта их не используют.
+    """
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            enqueue(deliver, serialize(message), queue='email')
+        return len(email_messages)
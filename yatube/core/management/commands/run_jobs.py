@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.jobs import Worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Выполняет отложенные задачи из очереди в пуле потоков. Лимиты '
+        'одновременных задач на очередь берутся из JOB_QUEUES и общие для '
+        'всех запущенных воркеров.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--queue', action='append', dest='queues',
+            help='Очередь для обработки; можно указать несколько раз.',
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            help='Размер пула; по умолчанию сумма лимитов очередей.',
+        )
+        parser.add_argument('--poll', type=float, default=1.0)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить готовые задачи и завершиться.',
+        )
+
+    def handle(self, *args, **options):
+        names = options['queues'] or list(settings.JOB_QUEUES)
+        unknown = set(names) - set(settings.JOB_QUEUES)
+        if unknown:
+            raise CommandError(
+                'Неизвестные очереди: ' + ', '.join(sorted(unknown))
+            )
+        queues = {name: settings.JOB_QUEUES[name] for name in names}
+        worker = Worker(
+            queues,
+            workers=options['workers'] or sum(queues.values()),
+            poll=options['poll'],
+        )
+        try:
+            worker.run(once=options['once'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {worker.processed}, '
+            f'с ошибкой: {worker.failed}'
+        ))
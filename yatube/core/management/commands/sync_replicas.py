@@ -0,0 +1,46 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS
+
+
+class Command(BaseCommand):
+    help = (
+        'Копирует основную базу SQLite в файлы реплик. Заменяет '
+        'репликацию при локальной проверке: с --interval реплики '
+        'обновляются периодически и отстают, как настоящие.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float,
+            help='Повторять копирование раз в столько секунд.',
+        )
+
+    def sync(self):
+        primary = settings.DATABASES[DEFAULT_DB_ALIAS]['NAME']
+        with closing(sqlite3.connect(primary)) as source:
+            for alias in settings.DATABASE_REPLICAS:
+                replica = settings.DATABASES[alias]['NAME']
+                with closing(sqlite3.connect(replica)) as target:
+                    source.backup(target)
+        self.stdout.write(
+            f'Скопировано в реплики: {len(settings.DATABASE_REPLICAS)}'
+        )
+
+    def handle(self, *args, **options):
+        engines = {
+            settings.DATABASES[alias]['ENGINE']
+            for alias in [DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS]
+        }
+        if engines != {'django.db.backends.sqlite3'}:
+            raise CommandError('Команда работает только с SQLite')
+        if not settings.DATABASE_REPLICAS:
+            raise CommandError('Реплики не заданы: см. YATUBE_DB_REPLICAS')
+        self.sync()
+        while options['interval']:
+            time.sleep(options['interval'])
+            self.sync()
@@ -0,0 +1,81 @@
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from .routers import read_from_replicas, wrote
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetMiddleware:
+    """Считает SQL-запросы каждого запроса в режиме отладки.
+
+    Число запросов отдаётся в заголовке ``X-Query-Count``; при
+    превышении ``QUERY_BUDGET`` в журнал пишется предупреждение.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        queries = []
+
+        def counter(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            response = self.get_response(request)
+        response['X-Query-Count'] = len(queries)
+        if len(queries) > settings.QUERY_BUDGET:
+            logger.warning(
+                '%s выполнил %d SQL-запросов при бюджете %d',
+                request.path, len(queries), settings.QUERY_BUDGET,
+            )
+        return response
+
+
+class ReplicaMiddleware:
+    """Разрешает безопасным запросам читать с реплик.
+
+    После записи клиент получает cookie ``REPLICA_STICKY_COOKIE``, и до
+    её истечения его запросы читают основную базу.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def is_sticky(self, request):
+        try:
+            until = float(request.COOKIES[settings.REPLICA_STICKY_COOKIE])
+        except (KeyError, ValueError):
+            return False
+        return until > time.time()
+
+    def __call__(self, request):
+        allowed = (
+            request.method in SAFE_METHODS and not self.is_sticky(request)
+        )
+        with read_from_replicas(allowed):
+            response = self.get_response(request)
+            if wrote():
+                response.set_cookie(
+                    settings.REPLICA_STICKY_COOKIE,
+                    str(time.time() + settings.REPLICA_STICKY_SECONDS),
+                    max_age=settings.REPLICA_STICKY_SECONDS,
+                    httponly=True,
+                    samesite='Lax',
+                )
+        return response
@@ -0,0 +1,37 @@
+"""Учёт SQL-запросов: бюджет запросов для тестов и отладки."""
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(func, *args, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Возвращает число SQL-запросов, выполненных ``func``."""
+    with CaptureQueriesContext(connections[using]) as context:
+        func(*args, **kwargs)
+    return len(context)
+
+
+@contextmanager
+def query_budget(limit, using=DEFAULT_DB_ALIAS):
+    """AssertionError, если блок выполнил больше ``limit`` запросов."""
+    with CaptureQueriesContext(connections[using]) as context:
+        yield context
+    if len(context) > limit:
+        queries = '\n'.join(query['sql'] for query in context.captured_queries)
+        raise AssertionError(
+            f'Выполнено {len(context)} запросов при бюджете {limit}:\n'
+            f'{queries}'
+        )
+
+
+class QueryBudgetMixin:
+    """Проверки N+1 для тестов на основе ``TestCase``."""
+
+    def assertQueriesStable(self, func, grow, steps=2):
+        """Число запросов ``func`` не растёт после каждого вызова ``grow``."""
+        baseline = count_queries(func)
+        for step in range(steps):
+            grow()
+            with self.subTest(step=step):
+                self.assertEqual(count_queries(func), baseline)
@@ -0,0 +1,69 @@
+"""Чтение с реплик и запись в основную базу.
+
+Реплики из ``DATABASE_REPLICAS`` читаются только внутри безопасных
+запросов (GET, HEAD, OPTIONS): их отмечает ``ReplicaMiddleware``.
+Команды, задачи очереди и фоновые потоки всегда работают с основной
+базой. После записи запрос и следующие ``REPLICA_STICKY_SECONDS``
+секунд запросы того же клиента читают основную базу, поэтому автор
+сразу видит свой пост или комментарий, даже если реплика отстаёт.
+
+Общие кэши (страницы, карточки, число записей) заполняются только по
+данным основной базы: иначе устаревший рендер с реплики попал бы под
+новую версию и достался бы всем, в том числе автору изменения.
+"""
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_state = threading.local()
+
+
+def replicas_allowed():
+    return getattr(_state, 'replicas', False)
+
+
+def wrote():
+    """Была ли запись в текущем запросе."""
+    return getattr(_state, 'wrote', False)
+
+
+def reads_replicas():
+    """Может ли чтение в текущем потоке уйти на отстающую реплику."""
+    return bool(
+        settings.DATABASE_REPLICAS
+        and replicas_allowed()
+        and not wrote()
+        and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+    )
+
+
+@contextmanager
+def read_from_replicas(allowed=True):
+    """Разрешает чтение с реплик в текущем потоке на время блока."""
+    previous = replicas_allowed(), wrote()
+    _state.replicas, _state.wrote = allowed, False
+    try:
+        yield
+    finally:
+        _state.replicas, _state.wrote = previous
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not reads_replicas():
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Реплики получают схему и данные репликацией.
+        return db not in settings.DATABASE_REPLICAS
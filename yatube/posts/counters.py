@@ -0,0 +1,87 @@
+"""Денормализованные счётчики постов, подписчиков и комментариев.
+
+Значения меняются атомарно через ``F()``-выражения в сигналах, а
+``recount()`` пересчитывает их целиком, если они разошлись с данными.
+"""
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, UserCounters
+
+User = get_user_model()
+
+
+def _user_counts(user_id):
+    return {
+        'posts': Post.objects.filter(author_id=user_id).count(),
+        'followers': Follow.objects.filter(author_id=user_id).count(),
+        'following': Follow.objects.filter(user_id=user_id).count(),
+    }
+
+
+def add_user(user_id, **deltas):
+    """Изменяет счётчики пользователя на ``deltas``."""
+    changes = {name: F(name) + delta for name, delta in deltas.items()}
+    if UserCounters.objects.filter(user_id=user_id).update(**changes):
+        return
+    # Уменьшать нечего: строку могли удалить вместе с пользователем, а
+    # разошедшиеся счётчики исправит ``recount()``.
+    if any(delta < 0 for delta in deltas.values()):
+        return
+    # Строки ещё нет: считаем значения по данным, которые уже
+    # включают текущее изменение.
+    try:
+        with transaction.atomic():
+            UserCounters.objects.create(
+                user_id=user_id, **_user_counts(user_id)
+            )
+    except IntegrityError:
+        UserCounters.objects.filter(user_id=user_id).update(**changes)
+
+
+def add_comments(post_id, delta):
+    Post.objects.filter(pk=post_id).update(
+        comments_count=F('comments_count') + delta
+    )
+
+
+def get_counters(user):
+    """Счётчики пользователя; нули, если строки ещё нет."""
+    try:
+        return user.counters
+    except UserCounters.DoesNotExist:
+        return UserCounters(user=user)
+
+
+def _count_by(model, field):
+    return dict(
+        model.objects.order_by().values_list(field).annotate(
+            total=Count('pk')
+        )
+    )
+
+
+@transaction.atomic
+def recount():
+    """Пересчитывает все счётчики пакетными запросами."""
+    posts = _count_by(Post, 'author')
+    followers = _count_by(Follow, 'author')
+    following = _count_by(Follow, 'user')
+    UserCounters.objects.all().delete()
+    UserCounters.objects.bulk_create(
+        (
+            UserCounters(
+                user_id=user_id,
+                posts=posts.get(user_id, 0),
+                followers=followers.get(user_id, 0),
+                following=following.get(user_id, 0),
+            )
+            for user_id in User.objects.values_list('pk', flat=True)
+        )
+    )
+    comments = Comment.objects.filter(
+        post=OuterRef('pk')
+    ).order_by().values('post').annotate(total=Count('pk')).values('total')
+    Post.objects.update(comments_count=Coalesce(Subquery(comments), 0))
@@ -0,0 +1,104 @@
+"""Потоковая выгрузка постов и комментариев автора.
+
+Строки читаются из базы через ``.iterator()`` и сразу отдаются порциями
+байтов, поэтому память не зависит от того, сколько написал автор. Посты
+выгружаются в формате, который понимает ``import_posts``.
+"""
+import json
+import zipfile
+
+from .models import Comment, Post
+
+CHUNK_SIZE = 2000
+FILE_CHUNK_SIZE = 64 * 1024
+FORMATS = ('jsonl', 'zip')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson',
+    'zip': 'application/zip',
+}
+
+
+def records(author):
+    """Посты автора, затем его комментарии, по одной записи."""
+    posts = Post.objects.filter(author=author).order_by('pk').values_list(
+        'pk', 'text', 'created', 'group__slug', 'image'
+    )
+    for pk, text, created, group, image in posts.iterator(CHUNK_SIZE):
+        yield {
+            'type': 'post',
+            'id': pk,
+            'author': author.username,
+            'text': text,
+            'created': created.isoformat(),
+            'group': group,
+            'image': image or None,
+        }
+    comments = Comment.objects.filter(author=author).order_by(
+        'pk'
+    ).values_list('pk', 'post_id', 'text', 'created')
+    for pk, post_id, text, created in comments.iterator(CHUNK_SIZE):
+        yield {
+            'type': 'comment',
+            'id': pk,
+            'post': post_id,
+            'author': author.username,
+            'text': text,
+            'created': created.isoformat(),
+        }
+
+
+def jsonl_lines(author):
+    for record in records(author):
+        yield (json.dumps(record, ensure_ascii=False) + '\n').encode()
+
+
+class _Pipe:
+    """Несмещаемый файл для ``ZipFile``: копит байты до выдачи."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_zip(author):
+    """ZIP с ``posts.jsonl`` и картинками постов в каталоге ``images/``."""
+    pipe = _Pipe()
+    storage = Post._meta.get_field('image').storage
+    with zipfile.ZipFile(pipe, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('posts.jsonl', 'w', force_zip64=True) as entry:
+            for line in jsonl_lines(author):
+                entry.write(line)
+                if pipe.chunks:
+                    yield pipe.drain()
+        images = Post.objects.filter(author=author).exclude(
+            image=''
+        ).order_by('pk').values_list('image', flat=True)
+        for name in images.iterator(CHUNK_SIZE):
+            if not storage.exists(name):
+                continue
+            # Картинки уже сжаты, повторное сжатие только тратит CPU.
+            info = zipfile.ZipInfo(f'images/{name}')
+            info.compress_type = zipfile.ZIP_STORED
+            with storage.open(name) as source:
+                with archive.open(info, 'w', force_zip64=True) as entry:
+                    for chunk in source.chunks(FILE_CHUNK_SIZE):
+                        entry.write(chunk)
+                        yield pipe.drain()
+    yield pipe.drain()
+
+
+def stream(author, format):
+    if format == 'zip':
+        return stream_zip(author)
+    return jsonl_lines(author)
@@ -0,0 +1,230 @@
+"""Граф подписок в памяти процесса.
+
+Для каждого пользователя хранятся отсортированные массивы id авторов,
+на которых он подписан, и id его подписчиков. Проверка подписки — это
+двоичный поиск, поэтому запросы к графу не ходят в базу.
+
+После фиксации транзакции сигналы ``Follow`` меняют граф текущего
+процесса и пишут изменение в журнал в кэше, как ``TwoTierCache``.
+Остальные процессы применяют изменения из журнала; граф перечитывается
+из базы целиком, если сообщение журнала пропало, кэш очищен (например,
+после ``seed``) и не реже раза в ``FOLLOW_GRAPH_MAX_AGE`` секунд — на
+случай подписок в обход сигналов.
+"""
+import heapq
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow
+
+VERSION_KEY = 'follow_graph:version'
+LOG_PREFIX = 'follow_graph:log'
+LOG_TIMEOUT = 5 * 60
+LOG_LIMIT = 1000
+
+ADD = 'add'
+REMOVE = 'remove'
+
+_EMPTY = array('q')
+
+
+def _contains(values, value):
+    index = bisect_left(values, value)
+    return index < len(values) and values[index] == value
+
+
+def _insert(values, value):
+    index = bisect_left(values, value)
+    if index == len(values) or values[index] != value:
+        values.insert(index, value)
+
+
+def _remove(values, value):
+    index = bisect_left(values, value)
+    if index < len(values) and values[index] == value:
+        del values[index]
+
+
+class FollowGraph:
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._following = {}
+        self._followers = {}
+        self._version = None
+        self._loaded_at = 0.0
+        self._popular = None
+
+    def _current_version(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            # Счётчик пропал вместе с кэшем: начинаем новый с текущего
+            # времени, он не совпадёт с прежним, и все процессы
+            # перечитают граф.
+            cache.add(VERSION_KEY, time.time_ns(), None)
+            version = cache.get(VERSION_KEY)
+        return version
+
+    def _load(self):
+        following, followers = {}, {}
+        # Пары идут по порядку (user, author), поэтому массивы подписок
+        # и подписчиков заполняются уже отсортированными.
+        pairs = Follow.objects.order_by('user_id', 'author_id').values_list(
+            'user_id', 'author_id'
+        )
+        for user_id, author_id in pairs.iterator():
+            following.setdefault(user_id, array('q')).append(author_id)
+            followers.setdefault(author_id, array('q')).append(user_id)
+        self._following, self._followers = following, followers
+        self._popular = None
+        self._loaded_at = time.monotonic()
+
+    def _expired(self):
+        return (
+            time.monotonic() - self._loaded_at > settings.FOLLOW_GRAPH_MAX_AGE
+        )
+
+    def _ensure_fresh(self):
+        version = self._current_version()
+        if version == self._version and not self._expired():
+            return
+        with self._lock:
+            if self._expired():
+                self._reload(version)
+                return
+            if version == self._version:
+                return
+            if (
+                self._version is None
+                or version < self._version
+                or version - self._version > LOG_LIMIT
+            ):
+                self._reload(version)
+                return
+            wanted = [
+                f'{LOG_PREFIX}:{number}'
+                for number in range(self._version + 1, version + 1)
+            ]
+            changes = cache.get_many(wanted)
+            # Пропавшее сообщение могло касаться любой подписки.
+            if len(changes) < len(wanted):
+                self._reload(version)
+                return
+            for key in wanted:
+                self._apply(*changes[key])
+            self._version = version
+
+    def _reload(self, version):
+        self._load()
+        self._version = version
+
+    def _apply(self, change, user_id, author_id):
+        following = self._following.setdefault(user_id, array('q'))
+        followers = self._followers.setdefault(author_id, array('q'))
+        if change == ADD:
+            _insert(following, author_id)
+            _insert(followers, user_id)
+        else:
+            _remove(following, author_id)
+            _remove(followers, user_id)
+        self._popular = None
+
+    def _change(self, change, user_id, author_id):
+        with self._lock:
+            self._apply(change, user_id, author_id)
+            try:
+                version = cache.incr(VERSION_KEY)
+            except ValueError:
+                # Счётчик пропал: граф перечитается при следующем запросе.
+                self._version = None
+                return
+            cache.set(
+                f'{LOG_PREFIX}:{version}', (change, user_id, author_id),
+                LOG_TIMEOUT,
+            )
+            # Если между нашими изменениями были чужие, граф догонит их
+            # по журналу вместе с нашим: изменения применяются повторно
+            # без вреда.
+            if self._version is not None and version == self._version + 1:
+                self._version = version
+
+    def add(self, user_id, author_id):
+        self._change(ADD, user_id, author_id)
+
+    def remove(self, user_id, author_id):
+        self._change(REMOVE, user_id, author_id)
+
+    def follows(self, user_id, author_id):
+        """Подписан ли ``user_id`` на ``author_id``."""
+        self._ensure_fresh()
+        return _contains(self._following.get(user_id, _EMPTY), author_id)
+
+    def following(self, user_id):
+        """Отсортированные id авторов, на которых подписан пользователь."""
+        self._ensure_fresh()
+        return list(self._following.get(user_id, _EMPTY))
+
+    def followers(self, user_id):
+        """Отсортированные id подписчиков пользователя."""
+        self._ensure_fresh()
+        return list(self._followers.get(user_id, _EMPTY))
+
+    def mutual(self, user_id):
+        """Id пользователей, подписанных друг на друга с ``user_id``."""
+        self._ensure_fresh()
+        return sorted(set(self._following.get(user_id, _EMPTY)).intersection(
+            self._followers.get(user_id, _EMPTY)
+        ))
+
+    def suggestions(self, user_id, limit):
+        """Кого почитать: авторы, на которых подписаны подписки.
+
+        Авторы упорядочены по числу подписок пользователя, которые их
+        читают, затем по числу подписчиков. Если таких нет, предлагаются
+        самые читаемые авторы.
+        """
+        self._ensure_fresh()
+        following = self._following.get(user_id, _EMPTY)
+        scores = Counter()
+        for friend_id in following:
+            scores.update(self._following.get(friend_id, _EMPTY))
+        for author_id in (user_id, *following):
+            scores.pop(author_id, None)
+        if scores:
+            # Полный порядок нужен только авторам с лучшими оценками.
+            lowest = heapq.nlargest(limit, scores.values())[-1]
+            candidates = [
+                author_id for author_id, score in scores.items()
+                if score >= lowest
+            ]
+            candidates.sort(key=lambda author_id: (
+                -scores[author_id],
+                -len(self._followers.get(author_id, _EMPTY)),
+                author_id,
+            ))
+            return candidates[:limit]
+        return [
+            author_id for author_id in self.popular(limit + len(following) + 1)
+            if author_id != user_id and not _contains(following, author_id)
+        ][:limit]
+
+    def popular(self, limit):
+        """Id самых читаемых авторов."""
+        self._ensure_fresh()
+        with self._lock:
+            if self._popular is None or len(self._popular) < limit:
+                self._popular = heapq.nsmallest(
+                    limit, self._followers,
+                    key=lambda author_id: (
+                        -len(self._followers[author_id]), author_id
+                    ),
+                )
+            return self._popular[:limit]
+
+
+graph = FollowGraph()
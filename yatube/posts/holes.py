@@ -0,0 +1,105 @@
+"""Персональные части страниц, общих для всех посетителей.
+
+Кэшируемые страницы рендерятся один раз на адрес: вместо шапки,
+кнопки подписки, ссылки на редактирование и формы комментария в них
+остаются метки ``{% hole %}``. На каждый запрос ``fill`` заменяет метки
+фрагментами, отрисованными для текущего пользователя, поэтому гости и
+вошедшие пользователи читают одну запись кэша.
+
+Аргументы фрагмента — строки из метки, поэтому функция фрагмента
+получает их одинаково при отрисовке на месте и при заполнении метки.
+"""
+import re
+from urllib.parse import parse_qsl
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.template.loader import render_to_string
+from django.utils.http import urlencode
+from django.utils.safestring import mark_safe
+
+from .forms import CommentForm
+from .graph import graph
+
+MARKER = re.compile(r'<!--hole:(\w+)\?([^>]*)-->')
+
+HOLES = {}
+
+User = get_user_model()
+
+
+def hole(name, template):
+    """Регистрирует фрагмент: функция строит его контекст по запросу."""
+    def decorator(get_context):
+        HOLES[name] = (template, get_context)
+        return get_context
+    return decorator
+
+
+def marker(name, **kwargs):
+    # urlencode экранирует «>», и метку не закроет значение аргумента.
+    return mark_safe(f'<!--hole:{name}?{urlencode(kwargs)}-->')
+
+
+def render(request, name, **kwargs):
+    """Фрагмент ``name`` для пользователя запроса."""
+    template, get_context = HOLES[name]
+    kwargs = {key: str(value) for key, value in kwargs.items()}
+    return render_to_string(
+        template, get_context(request, **kwargs), request=request
+    )
+
+
+def fill(request, response):
+    """Заполняет метки ответа фрагментами текущего пользователя."""
+    if response.streaming or not response.get(
+        'Content-Type', ''
+    ).startswith('text/html'):
+        return response
+    content = response.content.decode(response.charset)
+    response.content = MARKER.sub(
+        lambda match: render(
+            request, match[1], **dict(parse_qsl(match[2]))
+        ),
+        content,
+    )
+    return response
+
+
+@hole('header', 'includes/header.html')
+def header(request):
+    return {}
+
+
+@hole('switcher', 'posts/includes/switcher.html')
+def switcher(request):
+    return {}
+
+
+@hole('profile_actions', 'posts/includes/profile_actions.html')
+def profile_actions(request, author):
+    author = User.objects.get(pk=author)
+    following = (
+        request.user.is_authenticated
+        and graph.follows(request.user.pk, author.pk)
+    )
+    return {'author': author, 'following': following}
+
+
+@hole('suggestions', 'posts/includes/suggestions.html')
+def suggestions(request):
+    if not request.user.is_authenticated:
+        return {'suggested': []}
+    ids = graph.suggestions(request.user.pk, settings.FOLLOW_SUGGESTIONS)
+    users = User.objects.in_bulk(ids)
+    return {'suggested': [users[pk] for pk in ids if pk in users]}
+
+
+@hole('post_actions', 'posts/includes/post_actions.html')
+def post_actions(request, post, author):
+    return {'post_id': post, 'is_author': str(request.user.pk) == author}
+
+
+@hole('comment_form', 'posts/includes/comment_form.html')
+def comment_form(request, post):
+    return {'post_id': post, 'comment_form': CommentForm()}
@@ -0,0 +1,141 @@
+"""Приём картинок постов.
+
+Размер файла и картинки проверяется по заголовку, без декодирования
+пикселей. Затем картинка пережимается в пуле процессов: поворачивается
+по EXIF, уменьшается до ``IMAGE_MAX_SIDE``, теряет метаданные и
+сохраняется прогрессивным JPEG (PNG при прозрачности, WebP — если он
+включён и Pillow его поддерживает). Дальше миниатюры строятся уже из
+небольшого файла.
+"""
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django import forms
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, features
+
+EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp'}
+
+_pool = None
+
+
+def check(upload):
+    """Проверяет загруженный файл по размеру и заголовку картинки.
+
+    ``upload.image`` — картинка, открытая полем ``ImageField``: Pillow
+    читает при этом только заголовок.
+    """
+    if upload.size > settings.IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s МБ.',
+            code='file_too_large',
+            params={'limit': settings.IMAGE_MAX_UPLOAD_SIZE // 2 ** 20},
+        )
+    width, height = upload.image.size
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка %(width)s×%(height)s слишком большая.',
+            code='image_too_large',
+            params={'width': width, 'height': height},
+        )
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def output_format(image):
+    if settings.IMAGE_UPLOAD_WEBP and features.check('webp'):
+        return 'WEBP'
+    return 'PNG' if has_alpha(image) else 'JPEG'
+
+
+def reencode(data):
+    """Пережимает картинку; возвращает байты и формат.
+
+    Выполняется в отдельном процессе, поэтому принимает и отдаёт
+    только байты. Для анимированной картинки возвращает ``None``:
+    пережатие оставило бы один кадр.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        if getattr(source, 'is_animated', False):
+            return None
+        image = ImageOps.exif_transpose(source)
+        image.thumbnail(
+            (settings.IMAGE_MAX_SIDE, settings.IMAGE_MAX_SIDE),
+            Image.LANCZOS,
+        )
+        format = output_format(image)
+        options = {'optimize': True}
+        if format == 'JPEG':
+            image = image.convert('RGB')
+            options.update(
+                quality=settings.IMAGE_JPEG_QUALITY, progressive=True
+            )
+        elif format == 'WEBP':
+            image = image.convert('RGBA' if has_alpha(image) else 'RGB')
+            options = {'quality': settings.IMAGE_JPEG_QUALITY, 'method': 4}
+        elif image.mode not in ('RGBA', 'LA', 'L', 'P'):
+            image = image.convert('RGBA')
+        # Из метаданных остаются только профиль цвета и прозрачность.
+        icc_profile = source.info.get('icc_profile')
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        image.info = {
+            key: value for key, value in image.info.items()
+            if key == 'transparency'
+        }
+        output = io.BytesIO()
+        image.save(output, format, **options)
+    return output.getvalue(), format
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(settings.IMAGE_WORKERS)
+    return _pool
+
+
+def run_reencode(data):
+    """``reencode`` в пуле процессов или на месте при ``IMAGE_WORKERS=0``."""
+    global _pool
+    if not settings.IMAGE_WORKERS:
+        return reencode(data)
+    try:
+        return _get_pool().submit(reencode, data).result()
+    except BrokenProcessPool:
+        _pool = None
+        return reencode(data)
+
+
+def ingest(upload):
+    """Проверенная и пережатая копия загруженной картинки."""
+    check(upload)
+    upload.seek(0)
+    try:
+        result = run_reencode(upload.read())
+    except (OSError, ValueError, Image.DecompressionBombError):
+        raise ValidationError(
+            'Не удалось обработать картинку.', code='invalid_image'
+        )
+    if result is None:
+        upload.seek(0)
+        return upload
+    data, format = result
+    stem = os.path.splitext(os.path.basename(upload.name))[0]
+    return ContentFile(data, name=f'{stem}.{EXTENSIONS[format]}')
+
+
+def ingest_file(file):
+    """``ingest`` для файла не из формы, например при импорте.
+
+    Файл проходит ту же проверку ``ImageField``, что и загрузка.
+    """
+    return ingest(forms.ImageField().clean(file))
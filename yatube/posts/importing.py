@@ -0,0 +1,268 @@
+"""Потоковый импорт постов из JSONL и CSV.
+
+Записи читаются по одной и вставляются пачками ``bulk_create``. Авторы и
+группы ищутся одним запросом на пачку и запоминаются, картинки
+проверяются и пережимаются, как загрузки через форму, и сохраняются в
+``MEDIA_ROOT/posts/`` пулом потоков. Позиция в источнике
+хранится в ``ImportCheckpoint`` и меняется в той же транзакции, что и
+вставка, поэтому прерванный импорт продолжается без дублей.
+"""
+import csv
+import json
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import counters, images, search, thumbnails, timeline, versions
+from .models import Group, ImportCheckpoint, Post
+from .seeding import UNUSABLE_PASSWORD, chunked, explicit_created
+
+User = get_user_model()
+
+FORMATS = ('jsonl', 'csv')
+
+
+class RecordError(ValueError):
+    """Запись нельзя импортировать."""
+
+
+def read_records(file, format):
+    """Записи источника: строки JSONL или словари CSV."""
+    if format == 'csv':
+        return csv.DictReader(file)
+    return (line for line in file if line.strip())
+
+
+def parse_created(value):
+    if not value:
+        return timezone.now()
+    try:
+        created = parse_datetime(value)
+    except ValueError:
+        created = None
+    if created is None:
+        raise RecordError(f'некорректная дата {value!r}')
+    if timezone.is_naive(created):
+        created = timezone.make_aware(created)
+    return created
+
+
+def _string(raw, field):
+    """Строковое поле записи без пробелов по краям; ``''``, если его нет."""
+    value = raw.get(field)
+    if value is None:
+        return ''
+    if not isinstance(value, str):
+        raise RecordError(f'поле {field} должно быть строкой')
+    return value.strip()
+
+
+def parse_record(raw):
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError as error:
+            raise RecordError(f'некорректный JSON: {error}')
+        if not isinstance(raw, dict):
+            raise RecordError('ожидался JSON-объект')
+    if raw.get('type', 'post') != 'post':
+        raise RecordError(f'запись типа {raw["type"]!r} не пост')
+    text = _string(raw, 'text')
+    author = _string(raw, 'author')
+    if not text or not author:
+        raise RecordError('нет текста или автора')
+    return {
+        'text': text,
+        'author': author,
+        'group': _string(raw, 'group') or None,
+        'image': _string(raw, 'image') or None,
+        'created': parse_created(_string(raw, 'created')),
+    }
+
+
+class Importer:
+    def __init__(self, source, images_dir, batch_size=500, workers=4,
+                 create_authors=False, log=None):
+        self.source = source
+        self.images_dir = images_dir
+        self.batch_size = batch_size
+        self.workers = workers
+        self.create_authors = create_authors
+        self.log = log or (lambda message: None)
+        self.authors = {}
+        self.groups = {}
+        self.usernames = {}
+        self.slugs = {}
+        self.imported = 0
+        self.skipped = 0
+
+    def reject(self, number, reason):
+        self.skipped += 1
+        self.log(f'Запись {number} пропущена: {reason}')
+
+    def resolve_authors(self, usernames):
+        missing = set(usernames) - set(self.authors)
+        if not missing:
+            return
+        found = dict(User.objects.filter(
+            username__in=missing
+        ).values_list('username', 'pk'))
+        absent = missing - set(found)
+        if absent and self.create_authors:
+            User.objects.bulk_create(
+                User(username=username, password=UNUSABLE_PASSWORD)
+                for username in absent
+            )
+            found.update(User.objects.filter(
+                username__in=absent
+            ).values_list('username', 'pk'))
+        self.authors.update(dict.fromkeys(missing))
+        self.authors.update(found)
+        self.usernames.update((pk, name) for name, pk in found.items())
+
+    def resolve_groups(self, slugs):
+        missing = set(slugs) - set(self.groups)
+        if not missing:
+            return
+        found = dict(Group.objects.filter(
+            slug__in=missing
+        ).values_list('slug', 'pk'))
+        self.groups.update(dict.fromkeys(missing))
+        self.groups.update(found)
+        self.slugs.update((pk, slug) for slug, pk in found.items())
+
+    def image_path(self, path):
+        """Путь к картинке записи внутри ``images_dir``."""
+        root = os.path.realpath(self.images_dir)
+        source = os.path.realpath(os.path.join(root, path))
+        if os.path.commonpath([root, source]) != root:
+            raise RecordError(f'файл {path} вне каталога картинок')
+        if not os.path.isfile(source):
+            raise RecordError(f'нет файла {path}')
+        return source
+
+    def copy_image(self, path):
+        """Проверяет, пережимает и сохраняет картинку; возвращает имя.
+
+        Картинка проходит те же проверки, что и загрузка через форму.
+        Хранилище не пишет файл, который у него уже есть, поэтому
+        перезапуск импорта не плодит копии.
+        """
+        source = self.image_path(path)
+        field = Post._meta.get_field('image')
+        with open(source, 'rb') as file:
+            try:
+                image = images.ingest_file(
+                    File(file, name=os.path.basename(source))
+                )
+            except ValidationError as error:
+                raise RecordError(f'{path}: {" ".join(error.messages)}')
+            return field.storage.save(field.upload_to + image.name, image)
+
+    def valid_records(self, batch, position):
+        """Номера и разобранные записи, авторы и группы которых есть."""
+        records = []
+        for number, raw in enumerate(batch, position + 1):
+            try:
+                records.append((number, parse_record(raw)))
+            except RecordError as error:
+                self.reject(number, error)
+        self.resolve_authors(record['author'] for _, record in records)
+        self.resolve_groups(
+            record['group'] for _, record in records if record['group']
+        )
+        valid = []
+        for number, record in records:
+            if self.authors[record['author']] is None:
+                self.reject(number, f'нет автора {record["author"]}')
+            elif record['group'] and self.groups[record['group']] is None:
+                self.reject(number, f'нет группы {record["group"]}')
+            else:
+                valid.append((number, record))
+        return valid
+
+    def build_posts(self, batch, position, pool):
+        valid = self.valid_records(batch, position)
+        images = {
+            record['image']: pool.submit(self.copy_image, record['image'])
+            for _, record in valid if record['image']
+        }
+        posts = []
+        for number, record in valid:
+            image = ''
+            if record['image']:
+                try:
+                    image = images[record['image']].result()
+                except (RecordError, OSError) as error:
+                    self.reject(number, error)
+                    continue
+            posts.append(Post(
+                text=record['text'],
+                author_id=self.authors[record['author']],
+                group_id=self.groups.get(record['group']),
+                image=image,
+                created=record['created'],
+            ))
+        return posts
+
+    def after_insert(self, posts):
+        """То, что для одиночного поста делают сигналы."""
+        timeline.fan_out_many(posts)
+        search.index_posts(posts)
+        per_author = Counter(post.author_id for post in posts)
+        for author_id, total in per_author.items():
+            counters.add_user(author_id, posts=total)
+        scopes = {versions.GLOBAL}
+        for post in posts:
+            if post.image:
+                thumbnails.schedule(post.image.name)
+            scopes.add(versions.author_scope(self.usernames[post.author_id]))
+            if post.group_id:
+                scopes.add(versions.group_scope(self.slugs[post.group_id]))
+        transaction.on_commit(lambda: versions.bump(*scopes))
+
+    def import_batch(self, batch, position, pool):
+        posts = self.build_posts(batch, position, pool)
+        with transaction.atomic():
+            before = Post.objects.order_by('-pk').values_list(
+                'pk', flat=True
+            ).first() or 0
+            Post.objects.bulk_create(posts)
+            if posts and posts[0].pk is None:
+                posts = list(
+                    Post.objects.filter(pk__gt=before).order_by('pk')
+                )
+            if posts:
+                self.after_insert(posts)
+            ImportCheckpoint.objects.filter(source=self.source).update(
+                position=position + len(batch)
+            )
+        self.imported += len(posts)
+
+    def run(self, file, format):
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(
+            source=self.source
+        )
+        position = checkpoint.position
+        if position:
+            self.log(f'Продолжаем с записи {position + 1}')
+        records = islice(read_records(file, format), position, None)
+        with ThreadPoolExecutor(self.workers) as pool:
+            with explicit_created(Post):
+                for batch in chunked(records, self.batch_size):
+                    self.import_batch(batch, position, pool)
+                    position += len(batch)
+                    self.log(
+                        f'Обработано записей: {position}, '
+                        f'импортировано: {self.imported}, '
+                        f'пропущено: {self.skipped}'
+                    )
+        return position
@@ -0,0 +1,214 @@
+import json
+import time
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.template import base as template_base
+from django.test import Client
+from django.test.utils import (
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.seeding import Seeder
+
+User = get_user_model()
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(values, rank):
+    """Процентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    index = max(0, -(-rank * len(ordered) // 100) - 1)
+    return ordered[index]
+
+
+@contextmanager
+def sql_timer(timings):
+    """Записывает длительность каждого SQL-запроса."""
+    def execute(execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            timings.append(time.perf_counter() - start)
+
+    with connection.execute_wrapper(execute):
+        yield
+
+
+@contextmanager
+def render_timer(timings):
+    """Суммирует время рендеринга шаблонов верхнего уровня."""
+    original = template_base.Template.render
+    depth = [0]
+
+    def render(self, context):
+        depth[0] += 1
+        start = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            depth[0] -= 1
+            if not depth[0]:
+                timings.append(time.perf_counter() - start)
+
+    template_base.Template.render = render
+    try:
+        yield
+    finally:
+        template_base.Template.render = original
+
+
+def seed(size, seed):
+    """Создаёт тестовый набор из ``size`` постов."""
+    user_ids = Seeder(
+        users=size // 20 + 2,
+        posts=size,
+        comments=size,
+        follows=10,
+        groups=size // 100 + 1,
+        seed=seed,
+    ).run()
+    return User.objects.get(pk=user_ids[0])
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержку, SQL-запросы и рендеринг страниц постов на '
+        'тестовой базе и сравнивает их с сохранённым эталоном.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000)
+        parser.add_argument('--requests', type=int, default=30)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--warm', action='store_true',
+            help='Не очищать кэш перед запросами.',
+        )
+        parser.add_argument('--output', help='Файл для JSON-отчёта.')
+        parser.add_argument('--baseline', help='JSON-отчёт для сравнения.')
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать отчёт в файл --baseline.',
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Допустимый рост p95 относительно эталона.',
+        )
+
+    def scenarios(self, user):
+        post = Post.objects.order_by('-comments_count').first()
+        group = Group.objects.first()
+        return {
+            'index': ('get', reverse('posts:index'), None),
+            'group_posts': (
+                'get', reverse('posts:group_list', args=[group.slug]), None,
+            ),
+            'profile': (
+                'get', reverse('posts:profile', args=[user.username]), None,
+            ),
+            'post_detail': (
+                'get', reverse('posts:post_detail', args=[post.pk]), None,
+            ),
+            'follow_index': ('get', reverse('posts:follow_index'), None),
+            'post_create': (
+                'post', reverse('posts:post_create'),
+                {'text': 'Новый пост из замеров'},
+            ),
+            'add_comment': (
+                'post', reverse('posts:add_comment', args=[post.pk]),
+                {'text': 'Новый комментарий из замеров'},
+            ),
+        }
+
+    def measure(self, client, method, url, data, requests, warm):
+        latencies, queries, sql_times, renders = [], [], [], []
+        for _ in range(requests):
+            if not warm:
+                cache.clear()
+            sql, render = [], []
+            with sql_timer(sql), render_timer(render):
+                start = time.perf_counter()
+                getattr(client, method)(url, data)
+                latencies.append(time.perf_counter() - start)
+            queries.append(len(sql))
+            sql_times.append(sum(sql))
+            renders.append(sum(render))
+        report = {
+            f'p{rank}_ms': percentile(latencies, rank) * 1000
+            for rank in PERCENTILES
+        }
+        report.update(
+            queries=max(queries),
+            sql_ms=sum(sql_times) / requests * 1000,
+            render_ms=sum(renders) / requests * 1000,
+        )
+        return report
+
+    def compare(self, report, baseline, threshold):
+        regressions = []
+        for view, current in report.items():
+            expected = baseline.get(view)
+            if expected is None:
+                continue
+            if current['p95_ms'] > expected['p95_ms'] * (1 + threshold):
+                regressions.append(
+                    f'{view}: p95 {current["p95_ms"]:.1f} мс, '
+                    f'эталон {expected["p95_ms"]:.1f} мс'
+                )
+            if current['queries'] > expected['queries']:
+                regressions.append(
+                    f'{view}: {current["queries"]} SQL-запросов, '
+                    f'эталон {expected["queries"]}'
+                )
+        return regressions
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            user = seed(options['posts'], options['seed'])
+            client = Client()
+            client.force_login(user)
+            report = {
+                view: self.measure(
+                    client, method, url, data,
+                    options['requests'], options['warm'],
+                )
+                for view, (method, url, data) in self.scenarios(user).items()
+            }
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as file:
+                file.write(output)
+        else:
+            self.stdout.write(output)
+
+        baseline_path = options['baseline']
+        if not baseline_path:
+            return
+        if options['save_baseline']:
+            with open(baseline_path, 'w') as file:
+                file.write(output)
+            return
+        with open(baseline_path) as file:
+            baseline = json.load(file)
+        regressions = self.compare(report, baseline, options['threshold'])
+        if regressions:
+            raise CommandError(
+                'Производительность ухудшилась:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не найдено'))
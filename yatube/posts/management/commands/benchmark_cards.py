@@ -0,0 +1,109 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.template.loader import get_template
+from django.test.utils import (
+    override_settings,
+    setup_test_environment,
+    teardown_test_environment,
+)
+from django.urls import reverse
+
+from posts.management.commands.benchmark import seed
+from posts.models import Post
+from posts.templatetags.post_cards import CARD_TEMPLATE, CardRenderer
+
+UNCACHED_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', UNCACHED_LOADERS)]
+
+
+def render_per_item(posts):
+    """Шаблон и адреса ищутся заново для каждой карточки.
+
+    Так работали ``{% include %}`` и ``{% url %}`` внутри цикла ленты.
+    """
+    for post in posts:
+        get_template(CARD_TEMPLATE).render({
+            'post': post,
+            'profile_url': reverse(
+                'posts:profile', args=[post.author.username]
+            ),
+            'detail_url': reverse('posts:post_detail', args=[post.pk]),
+            'group_url': post.group and reverse(
+                'posts:group_list', args=[post.group.slug]
+            ),
+        })
+
+
+def render_compiled(posts):
+    renderer = CardRenderer(show_group=True)
+    for post in posts:
+        renderer.render(post)
+
+
+def loaders_settings(loaders):
+    # С явными загрузчиками Django не принимает APP_DIRS.
+    engine = {
+        **settings.TEMPLATES[0],
+        'APP_DIRS': False,
+        'OPTIONS': {**settings.TEMPLATES[0]['OPTIONS'], 'loaders': loaders},
+    }
+    return override_settings(TEMPLATES=[engine])
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет время рендеринга одной карточки поста: по шаблону на '
+        'каждую карточку и одним скомпилированным шаблоном, с кэшем '
+        'загрузчика шаблонов и без него.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=200)
+        parser.add_argument('--rounds', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def measure(self, render, posts, rounds):
+        """Лучшее из ``rounds`` время на карточку, в микросекундах."""
+        best = None
+        for _ in range(rounds):
+            start = time.perf_counter()
+            render(posts)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best / len(posts) * 1_000_000
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            seed(options['posts'], options['seed'])
+            posts = list(Post.objects.select_related('author', 'group')[
+                :options['posts']
+            ])
+            rows = []
+            for loader, loaders in (
+                ('без кэша', UNCACHED_LOADERS),
+                ('с кэшем', CACHED_LOADERS),
+            ):
+                with loaders_settings(loaders):
+                    for method, render in (
+                        ('по шаблону на карточку', render_per_item),
+                        ('один шаблон на ленту', render_compiled),
+                    ):
+                        cost = self.measure(render, posts, options['rounds'])
+                        rows.append((loader, method, cost))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        for loader, method, cost in rows:
+            self.stdout.write(
+                f'Загрузчик {loader}, {method}: {cost:.0f} мкс на карточку'
+            )
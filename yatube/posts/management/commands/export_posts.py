@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.exporting import FORMATS, stream
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Выгружает посты и комментарии автора в JSONL или ZIP.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=FORMATS, default='jsonl')
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'Нет пользователя {options["username"]}')
+        if options['output']:
+            with open(options['output'], 'wb') as file:
+                for chunk in stream(author, options['format']):
+                    file.write(chunk)
+            return
+        if options['format'] == 'zip':
+            raise CommandError('Для ZIP укажите --output')
+        for chunk in stream(author, options['format']):
+            self.stdout.write(chunk.decode(), ending='')
@@ -0,0 +1,64 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.importing import FORMATS, Importer
+from posts.models import ImportCheckpoint
+
+
+class Command(BaseCommand):
+    help = (
+        'Импортирует посты из файла JSONL или CSV с полями author, text, '
+        'group, created и image. Прерванный импорт продолжается с места '
+        'остановки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами.')
+        parser.add_argument(
+            '--format', choices=FORMATS,
+            help='Формат файла; по умолчанию по расширению.',
+        )
+        parser.add_argument(
+            '--images-dir',
+            help='Каталог картинок; по умолчанию каталог файла.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Потоков для копирования картинок.',
+        )
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='Создавать отсутствующих авторов.',
+        )
+        parser.add_argument(
+            '--restart', action='store_true',
+            help='Начать с первой записи, забыв сохранённую позицию.',
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options['path'])
+        if not os.path.isfile(path):
+            raise CommandError(f'Файл {path} не найден')
+        format = options['format'] or os.path.splitext(path)[1][1:].lower()
+        if format not in FORMATS:
+            raise CommandError(
+                'Укажите --format: ' + ', '.join(FORMATS)
+            )
+        if options['restart']:
+            ImportCheckpoint.objects.filter(source=path).delete()
+        importer = Importer(
+            source=path,
+            images_dir=options['images_dir'] or os.path.dirname(path),
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            create_authors=options['create_authors'],
+            log=self.stdout.write,
+        )
+        with open(path, newline='', encoding='utf-8') as file:
+            importer.run(file, format)
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано постов: {importer.imported}, '
+            f'пропущено записей: {importer.skipped}'
+        ))
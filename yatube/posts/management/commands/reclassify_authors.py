@@ -0,0 +1,26 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts.timeline import reclassify
+
+
+class Command(BaseCommand):
+    help = (
+        'Переводит авторов с большим числом подписчиков на чтение '
+        'ленты по запросу и возвращает остальных к рассылке постов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--threshold',
+            type=int,
+            default=settings.FEED_PULL_THRESHOLD,
+            help='Число подписчиков, начиная с которого пост не рассылается.',
+        )
+
+    def handle(self, *args, **options):
+        pulled, pushed = reclassify(options['threshold'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Переведено на чтение по запросу: {len(pulled)}, '
+            f'возвращено к рассылке: {len(pushed)}'
+        ))
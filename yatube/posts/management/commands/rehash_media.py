@@ -0,0 +1,62 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.template.defaultfilters import filesizeformat
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Переименовывает картинки постов по хэшу содержимого, удаляет '
+        'дубли и сообщает, сколько места освободилось.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать, ничего не меняя.',
+        )
+
+    def move(self, storage, name, hashed):
+        """Переносит файл под хэш-имя вместе с постами и миниатюрами."""
+        with storage.open(name) as file:
+            storage.save(name, file)
+        Post.objects.filter(image=name).update(image=hashed)
+        default.kvstore.delete(ImageFile(name, storage))
+        storage.delete(name)
+        thumbnails.schedule(hashed)
+
+    def handle(self, *args, **options):
+        storage = Post._meta.get_field('image').storage
+        names = Post.objects.exclude(image='').order_by('image').values_list(
+            'image', flat=True
+        ).distinct()
+        seen = set()
+        renamed = duplicates = missing = reclaimed = 0
+        # Список целиком: строки постов меняются по ходу обхода.
+        for name in list(names):
+            if not storage.exists(name):
+                missing += 1
+                continue
+            with storage.open(name) as file:
+                hashed = storage.hashed_name(name, file)
+            if hashed == name:
+                seen.add(name)
+                continue
+            renamed += 1
+            if hashed in seen or storage.exists(hashed):
+                duplicates += 1
+                reclaimed += storage.size(name)
+            seen.add(hashed)
+            if not options['dry_run']:
+                self.move(storage, name, hashed)
+        if renamed and not options['dry_run']:
+            cache.clear()
+        self.stdout.write(
+            f'Переименовано файлов: {renamed}, из них дублей: {duplicates}, '
+            f'нет на диске: {missing}. '
+            f'Освобождено: {filesizeformat(reclaimed)}'
+        )
@@ -0,0 +1,74 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.seeding import END, Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'подписками и комментариями. Один и тот же --seed на одинаковой '
+        'базе даёт одинаковые данные.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument(
+            '--follows', type=int, default=20,
+            help='Среднее число подписок на пользователя.',
+        )
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument(
+            '--images', type=int, default=0,
+            help='Сколько картинок-заглушек создать для постов.',
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней распределить посты.',
+        )
+        parser.add_argument(
+            '--end', default=END.isoformat(),
+            help='Дата и время самого позднего поста, ISO 8601.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--batch-size', type=int,
+            help='Строк в одном INSERT; по умолчанию предел базы.',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=50000,
+            help='Сколько строк записывать в одной транзакции.',
+        )
+        parser.add_argument(
+            '--alpha', type=float, default=1.1,
+            help='Показатель степенного закона популярности авторов.',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError('Нужен хотя бы один пользователь')
+        end = parse_datetime(options['end'])
+        if end is None:
+            raise CommandError(f'Неверная дата --end: {options["end"]}')
+        if timezone.is_naive(end):
+            end = timezone.make_aware(end, timezone.utc)
+        Seeder(
+            users=options['users'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            groups=options['groups'],
+            images=options['images'],
+            days=options['days'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            chunk_size=options['chunk_size'],
+            alpha=options['alpha'],
+            end=end,
+            log=self.stdout.write,
+        ).run()
+        self.stdout.write(self.style.SUCCESS('Данные созданы'))
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+from posts.stemmer import normalize
+
+TOKENIZER = 'unicode61 remove_diacritics 2'
+
+
+def create_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "CREATE VIRTUAL TABLE posts_post_search "
+            f"USING fts5(body, tokenize='{TOKENIZER}')"
+        )
+        cursor.execute(
+            "CREATE VIRTUAL TABLE posts_comment_search "
+            f"USING fts5(body, post_id UNINDEXED, tokenize='{TOKENIZER}')"
+        )
+        cursor.executemany(
+            'INSERT INTO posts_post_search (rowid, body) VALUES (%s, %s)',
+            (
+                (pk, normalize(text))
+                for pk, text in Post.objects.values_list('pk', 'text')
+            ),
+        )
+        cursor.executemany(
+            'INSERT INTO posts_comment_search (rowid, body, post_id) '
+            'VALUES (%s, %s, %s)',
+            (
+                (pk, normalize(text), post_id)
+                for pk, text, post_id in Comment.objects.values_list(
+                    'pk', 'text', 'post_id'
+                )
+            ),
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute('DROP TABLE IF EXISTS posts_post_search')
+        cursor.execute('DROP TABLE IF EXISTS posts_comment_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
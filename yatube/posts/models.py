@@ -3,6 +3,8 @@ from django.db import models
 
 from core.models import CreatedModel
 
+from .storage import post_images
+
 User = get_user_model()
 
 
@@ -49,17 +51,48 @@ class Post(CreatedModel):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=post_images,
         blank=True
     )
+    comments_count = models.PositiveIntegerField(
+        'Число комментариев',
+        default=0,
+        editable=False,
+    )
 
     class Meta:
         ordering = ['-created']
         verbose_name = 'Пост'
         verbose_name_plural = 'Посты'
+        # Ленты идут по ключу (created, id) от новых к старым: целиком,
+        # по автору и по группе.
+        indexes = [
+            models.Index(
+                fields=('-created', '-id'), name='post_created',
+            ),
+            models.Index(
+                fields=('author', '-created', '-id'),
+                name='post_author_created',
+            ),
+            models.Index(
+                fields=('group', '-created', '-id'),
+                name='post_group_created',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
 
+    def save(self, *args, **kwargs):
+        # Счётчик меняется только F()-выражениями в posts.counters,
+        # поэтому при правке поста его устаревшее значение не пишется.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'comments_count'
+            ]
+        super().save(*args, **kwargs)
+
 
 class Comment (CreatedModel):
     post = models.ForeignKey(
@@ -83,6 +116,12 @@ class Comment (CreatedModel):
         ordering = ['-created']
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(
+                fields=('post', '-created', '-id'),
+                name='comment_post_created',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
@@ -111,6 +150,107 @@ class Follow(models.Model):
                 check=~models.Q(user=models.F('author')),
                 name='do not self-follow'),
         ]
+        # Подписчики автора: рассылка постов и счётчики.
+        indexes = [
+            models.Index(
+                fields=('author', 'user'), name='follow_author_user',
+            ),
+        ]
 
     def __str__(self):
         return self.text[:15]
+
+
+class UserCounters(models.Model):
+    """Денормализованные счётчики пользователя."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='counters',
+        verbose_name='Пользователь',
+    )
+    posts = models.PositiveIntegerField('Постов', default=0)
+    followers = models.PositiveIntegerField('Подписчиков', default=0)
+    following = models.PositiveIntegerField('Подписок', default=0)
+
+    class Meta:
+        verbose_name = 'Счётчики пользователя'
+        verbose_name_plural = 'Счётчики пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class PullAuthor(models.Model):
+    """Автор, чьи посты подмешиваются в ленты при чтении.
+
+    У таких авторов слишком много подписчиков для fan-out on write,
+    поэтому их посты не копируются в ``TimelineEntry``.
+    """
+    author = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        related_name='pull_author',
+        verbose_name='Автор',
+    )
+    followers = models.PositiveIntegerField(
+        'Подписчиков на момент классификации',
+        default=0,
+    )
+
+    class Meta:
+        verbose_name = 'Автор без рассылки'
+        verbose_name_plural = 'Авторы без рассылки'
+
+    def __str__(self):
+        return str(self.author)
+
+
+class TimelineEntry(models.Model):
+    """Пост в материализованной ленте подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель',
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост',
+    )
+    created = models.DateTimeField('Дата создания поста')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'post'), name='unique_timeline_entry'
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-created', '-post'),
+                name='timeline_user_created',
+            ),
+        ]
+
+
+class ImportCheckpoint(models.Model):
+    """Сколько записей источника уже импортировано.
+
+    Позиция меняется в одной транзакции с вставкой постов, поэтому
+    после сбоя импорт продолжается без дублей.
+    """
+    source = models.CharField('Источник', max_length=255, unique=True)
+    position = models.PositiveIntegerField('Обработано записей', default=0)
+    updated = models.DateTimeField('Обновлено', auto_now=True)
+
+    class Meta:
+        verbose_name = 'Точка восстановления импорта'
+        verbose_name_plural = 'Точки восстановления импорта'
+
+    def __str__(self):
+        return f'{self.source}: {self.position}'
@@ -0,0 +1,212 @@
+import base64
+import binascii
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Page, Paginator
+from django.db.models import Q, QuerySet
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core.background import run_in_thread
+from core.routers import reads_replicas
+
+logger = logging.getLogger(__name__)
+
+
+def encode_cursor(obj):
+    """Кодирует позицию записи (created, pk) в непрозрачный токен."""
+    raw = f'{obj.created.isoformat()}|{obj.pk}'.encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Возвращает (created, pk) из токена или None для мусорного ввода."""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        created, pk = raw.rsplit('|', 1)
+        created = parse_datetime(created)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        return None
+    if created is None:
+        return None
+    return created, pk
+
+
+def keyset_slice(queryset, after=None, before=None, limit=10,
+                 fields=('created', 'pk')):
+    """Срез ленты по ключу (created, pk) от новых записей к старым.
+
+    Вместо LIMIT/OFFSET выполняется один диапазонный запрос по индексу.
+    Возвращает не более ``limit`` записей в порядке убывания. Через
+    ``fields`` можно указать другие поля с той же парой значений.
+    """
+    created_field, pk_field = fields
+    if before is not None:
+        created, pk = before
+        rows = list(
+            queryset.filter(
+                Q(**{f'{created_field}__gt': created})
+                | Q(**{created_field: created, f'{pk_field}__gt': pk})
+            ).order_by(created_field, pk_field)[:limit]
+        )
+        rows.reverse()
+        return rows
+    queryset = queryset.order_by(f'-{created_field}', f'-{pk_field}')
+    if after is not None:
+        created, pk = after
+        queryset = queryset.filter(
+            Q(**{f'{created_field}__lt': created})
+            | Q(**{created_field: created, f'{pk_field}__lt': pk})
+        )
+    return list(queryset[:limit])
+
+
+def cursor_page(rows, paginator, has_next, has_previous):
+    """Страница курсорной ленты: соседи известны без ``COUNT(*)``.
+
+    Шаблоны и проверки ждут ровно ``Page``, поэтому вместо подкласса
+    ``has_next`` и ``has_previous`` отвечают флагами этой страницы.
+    """
+    page = Page(rows, 1, paginator)
+    page.has_next = lambda: has_next
+    page.has_previous = lambda: has_previous
+    return page
+
+
+class CursorPaginator(Paginator):
+    """Пагинатор ленты по курсорам ``?after=``/``?before=``.
+
+    Не считает ``COUNT(*)`` и не использует OFFSET: каждая страница
+    стоит одного диапазонного запроса. Источником может быть QuerySet
+    либо объект с методом ``keyset_slice(after, before, limit)``.
+    """
+    cursor_mode = True
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.next_cursor = None
+        self.previous_cursor = None
+
+    def fetch(self, after=None, before=None, limit=None):
+        if isinstance(self.object_list, QuerySet):
+            return keyset_slice(
+                self.object_list, after=after, before=before, limit=limit
+            )
+        return self.object_list.keyset_slice(
+            after=after, before=before, limit=limit
+        )
+
+    def get_cursor_page(self, after=None, before=None):
+        return self.get_key_page(decode_cursor(after), decode_cursor(before))
+
+    def get_key_page(self, after=None, before=None):
+        """Страница по уже разобранным ключам ``(created, pk)``."""
+        rows = self.fetch(
+            after=after if before is None else None,
+            before=before,
+            limit=self.per_page + 1,
+        )
+        has_more = len(rows) > self.per_page
+        if before is not None:
+            if has_more:
+                rows = rows[1:]
+            has_next, has_previous = True, has_more
+        else:
+            rows = rows[:self.per_page]
+            has_next, has_previous = has_more, after is not None
+        if rows and has_next:
+            self.next_cursor = encode_cursor(rows[-1])
+        if rows and has_previous:
+            self.previous_cursor = encode_cursor(rows[0])
+        return cursor_page(rows, self, has_next, has_previous)
+
+
+def _refresh_count(key, queryset):
+    try:
+        cache.set(key, (queryset.count(), time.time()), None)
+    except Exception:
+        logger.exception('Не удалось пересчитать %s', key)
+    finally:
+        cache.delete(f'{key}:lock')
+
+
+class WindowedPaginator(Paginator):
+    """Пагинатор по номерам страниц для ссылок ``?page=``.
+
+    Выводит скользящее окно страниц с многоточиями вместо всего
+    ``page_range``, а число записей берёт из кэша. Устаревшее значение
+    отдаётся сразу и пересчитывается в фоновом потоке, поэтому
+    ``COUNT(*)`` выполняется в запросе только при холодном кэше.
+    """
+    on_each_side = 2
+    on_ends = 1
+
+    def __init__(self, object_list, per_page, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self.window = []
+
+    @cached_property
+    def count(self):
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        try:
+            sql, params = self.object_list.query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = 'paginator_count:' + hashlib.md5(
+            f'{sql}{params}'.encode()
+        ).hexdigest()
+        cached = cache.get(key)
+        if cached is None:
+            count = self.object_list.count()
+            # Число с отстающей реплики не сохраняем на весь TTL.
+            if not reads_replicas():
+                cache.set(key, (count, time.time()), None)
+            return count
+        count, counted_at = cached
+        stale = time.time() - counted_at > settings.PAGINATOR_COUNT_TTL
+        if stale and cache.add(f'{key}:lock', True, 60):
+            run_in_thread(_refresh_count, key, self.object_list.all())
+        return count
+
+    def page_window(self, number):
+        """Номера страниц вокруг ``number``; ``None`` обозначает пропуск."""
+        last = self.num_pages
+        shown = set(range(1, min(self.on_ends, last) + 1))
+        shown |= set(range(max(last - self.on_ends + 1, 1), last + 1))
+        shown |= set(range(
+            max(number - self.on_each_side, 1),
+            min(number + self.on_each_side, last) + 1,
+        ))
+        window = []
+        for page_number in sorted(shown):
+            if window and page_number - window[-1] > 1:
+                window.append(None)
+            window.append(page_number)
+        return window
+
+    def page(self, number):
+        page = super().page(number)
+        self.window = self.page_window(page.number)
+        return page
+
+
+def paginate(posts, request, per_page):
+    """Страница ленты: по курсору, либо по номеру при ``?page=``."""
+    if 'page' in request.GET:
+        paginator = WindowedPaginator(posts, per_page)
+        return paginator.get_page(request.GET.get('page'))
+    paginator = CursorPaginator(posts, per_page)
+    return paginator.get_cursor_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
@@ -0,0 +1,151 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+На SQLite тексты хранятся в виртуальных таблицах FTS5 в виде основ слов
+(``posts.stemmer``), поэтому запрос «котами» находит пост про «кота».
+Индекс обновляется сигналами при сохранении и удалении, а результаты
+сортируются по BM25. На других базах поиск сводится к ``icontains``.
+"""
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from .models import Comment, Post
+from .stemmer import normalize, tokens
+
+POST_INDEX = 'posts_post_search'
+COMMENT_INDEX = 'posts_comment_search'
+# Совпадение в комментарии весит меньше совпадения в тексте поста.
+COMMENT_WEIGHT = 0.5
+
+
+def enabled():
+    return connection.vendor == 'sqlite'
+
+
+def index_posts(posts):
+    if not enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT OR REPLACE INTO {POST_INDEX} (rowid, body) '
+            f'VALUES (%s, %s)',
+            [(post.pk, normalize(post.text)) for post in posts],
+        )
+
+
+def index_post(post):
+    index_posts([post])
+
+
+def index_comment(comment):
+    if not enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT OR REPLACE INTO {COMMENT_INDEX} (rowid, body, post_id) '
+            f'VALUES (%s, %s, %s)',
+            [comment.pk, normalize(comment.text), comment.post_id],
+        )
+
+
+def unindex(table, pk):
+    if not enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {table} WHERE rowid = %s', [pk])
+
+
+def rebuild():
+    """Заполняет индекс заново, например после массовой загрузки."""
+    if not enabled():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {POST_INDEX}')
+        cursor.execute(f'DELETE FROM {COMMENT_INDEX}')
+        posts = Post.objects.values_list('pk', 'text').iterator()
+        cursor.executemany(
+            f'INSERT INTO {POST_INDEX} (rowid, body) VALUES (%s, %s)',
+            ((pk, normalize(text)) for pk, text in posts),
+        )
+        comments = Comment.objects.values_list(
+            'pk', 'text', 'post_id'
+        ).iterator()
+        cursor.executemany(
+            f'INSERT INTO {COMMENT_INDEX} (rowid, body, post_id) '
+            f'VALUES (%s, %s, %s)',
+            (
+                (pk, normalize(text), post_id)
+                for pk, text, post_id in comments
+            ),
+        )
+
+
+def match_expression(query):
+    """Запрос FTS5: все слова запроса, каждое как префикс основы."""
+    return ' '.join(f'"{token}"*' for token in tokens(query))
+
+
+def post_ids(query):
+    """Подзапрос id постов, текст которых подходит под ``query``."""
+    return RawSQL(
+        f'SELECT rowid FROM {POST_INDEX} WHERE {POST_INDEX} MATCH %s',
+        [match_expression(query)],
+    )
+
+
+class SearchResults:
+    """Посты, найденные по тексту и комментариям, лучшие первыми.
+
+    Поддерживает ``count()`` и срезы, поэтому подходит для
+    ``Paginator``: в базу уходит только нужная страница id.
+    """
+
+    def __init__(self, query):
+        self.expression = match_expression(query)
+        self._count = None
+
+    def _matches(self):
+        return (
+            f'SELECT rowid AS post_id, bm25({POST_INDEX}) AS score '
+            f'FROM {POST_INDEX} WHERE {POST_INDEX} MATCH %s '
+            f'UNION ALL '
+            f'SELECT post_id, bm25({COMMENT_INDEX}) * {COMMENT_WEIGHT} '
+            f'FROM {COMMENT_INDEX} WHERE {COMMENT_INDEX} MATCH %s'
+        ), [self.expression, self.expression]
+
+    def count(self):
+        if self._count is None:
+            if not self.expression:
+                self._count = 0
+                return 0
+            sql, params = self._matches()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT COUNT(DISTINCT post_id) FROM ({sql})', params
+                )
+                self._count = cursor.fetchone()[0]
+        return self._count
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice) or not self.expression:
+            return []
+        start = index.start or 0
+        sql, params = self._matches()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post_id FROM ({sql}) GROUP BY post_id '
+                f'ORDER BY MIN(score), post_id DESC LIMIT %s OFFSET %s',
+                params + [index.stop - start, start],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        posts = Post.objects.select_related('author', 'group').in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
+
+
+def search_posts(query):
+    """Результаты поиска для пагинатора."""
+    if enabled():
+        return SearchResults(query)
+    return Post.objects.filter(
+        Q(text__icontains=query) | Q(comments__text__icontains=query)
+    ).distinct().select_related('author', 'group')
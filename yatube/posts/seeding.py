@@ -0,0 +1,235 @@
+"""Быстрая генерация синтетических данных для замеров.
+
+Строки создаются генераторами и пишутся пакетами ``bulk_create`` в
+отдельных транзакциях, поэтому память не растёт с размером набора.
+Распределения подобраны под реальную соцсеть: популярность авторов
+подчиняется степенному закону, посты выходят сериями. Один и тот же
+``seed`` с одним и тем же ``end`` всегда даёт один и тот же набор.
+"""
+import bisect
+import io
+import itertools
+import random
+from array import array
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.utils import timezone
+
+from . import search, timeline
+from .counters import recount
+from .models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+UNUSABLE_PASSWORD = '!seed'
+
+# Даты постов отсчитываются назад от этого момента, а не от текущего
+# времени: иначе два запуска с одним seed дали бы разные строки.
+END = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+@contextmanager
+def explicit_created(*models):
+    """Позволяет задать ``created`` вместо ``auto_now_add``."""
+    fields = [model._meta.get_field('created') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ZipfSampler:
+    """Выбор индекса из ``range(n)`` с весами ``1 / (rank + 1) ** alpha``."""
+
+    def __init__(self, n, alpha, rng):
+        self.rng = rng
+        self.order = list(range(n))
+        rng.shuffle(self.order)
+        self.cumulative = list(itertools.accumulate(
+            1 / (rank + 1) ** alpha for rank in range(n)
+        ))
+
+    def __call__(self):
+        point = self.rng.random() * self.cumulative[-1]
+        return self.order[bisect.bisect(self.cumulative, point)]
+
+
+class Seeder:
+    def __init__(self, users=1000, posts=10000, comments=20000, follows=20,
+                 groups=100, images=0, days=365, seed=0, batch_size=None,
+                 chunk_size=50000, alpha=1.1, end=END, log=None):
+        self.users = users
+        self.posts = posts
+        self.comments = comments
+        self.follows = follows
+        self.groups = groups
+        self.images = images
+        self.days = days
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.alpha = alpha
+        self.rng = random.Random(seed)
+        self.log = log or (lambda message: None)
+        self.end = end
+        self.start = self.end - timedelta(days=days)
+
+    def insert(self, model, rows):
+        total = 0
+        for chunk in chunked(rows, self.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk, batch_size=self.batch_size)
+            total += len(chunk)
+        self.log(f'{model.__name__}: {total}')
+
+    def last_pk(self, model):
+        return model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        ).first() or 0
+
+    def new_ids(self, model, after):
+        return list(model.objects.filter(pk__gt=after).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
+
+    def seed_users(self):
+        start = self.last_pk(User)
+        self.insert(User, (
+            User(
+                username=f'seed_{start + number}',
+                first_name='Пользователь',
+                last_name=str(start + number),
+                password=UNUSABLE_PASSWORD,
+            )
+            for number in range(self.users)
+        ))
+        return self.new_ids(User, start)
+
+    def seed_groups(self):
+        start = self.last_pk(Group)
+        self.insert(Group, (
+            Group(
+                title=f'Группа {start + number}',
+                slug=f'seed-{start + number}',
+                description=f'Сгенерированная группа {start + number}',
+            )
+            for number in range(self.groups)
+        ))
+        return self.new_ids(Group, start)
+
+    def seed_images(self):
+        if not self.images:
+            return []
+        from PIL import Image
+
+        field = Post._meta.get_field('image')
+        names = []
+        for number in range(self.images):
+            color = tuple(self.rng.randrange(256) for _ in range(3))
+            buffer = io.BytesIO()
+            Image.new('RGB', (960, 540), color).save(buffer, 'JPEG')
+            names.append(field.storage.save(
+                f'{field.upload_to}seed_{number}.jpg',
+                ContentFile(buffer.getvalue()),
+            ))
+        return names
+
+    def follow_rows(self, user_ids, popularity):
+        for user_id in user_ids:
+            degree = min(
+                int(self.rng.paretovariate(1.5) * self.follows / 3),
+                len(user_ids) // 2,
+            )
+            authors = set()
+            # Хвост распределения выпадает редко: ограничиваем число
+            # попыток, чтобы не перебирать почти всех пользователей.
+            for _ in range(degree * 10):
+                if len(authors) >= degree:
+                    break
+                author_id = user_ids[popularity()]
+                if author_id != user_id:
+                    authors.add(author_id)
+            for author_id in authors:
+                yield Follow(user_id=user_id, author_id=author_id)
+
+    def post_rows(self, user_ids, group_ids, images, activity, created):
+        span = (self.end - self.start).total_seconds()
+        made = 0
+        while made < self.posts:
+            author_id = user_ids[activity()]
+            moment = self.rng.random() * span
+            burst = min(int(self.rng.paretovariate(1.2)), self.posts - made)
+            group_id = self.rng.choice(group_ids) if group_ids else None
+            for _ in range(burst):
+                moment = min(moment + self.rng.expovariate(1 / 600), span)
+                created.append(moment)
+                image = ''
+                if images and self.rng.random() < 0.3:
+                    image = self.rng.choice(images)
+                yield Post(
+                    author_id=author_id,
+                    group_id=group_id,
+                    text=f'Сгенерированный пост {made}',
+                    image=image,
+                    created=self.start + timedelta(seconds=moment),
+                )
+                made += 1
+
+    def comment_rows(self, user_ids, post_ids, created, popularity):
+        span = (self.end - self.start).total_seconds()
+        for number in range(self.comments):
+            index = popularity()
+            moment = min(
+                created[index] + self.rng.expovariate(1 / 3600), span
+            )
+            yield Comment(
+                post_id=post_ids[index],
+                author_id=self.rng.choice(user_ids),
+                text=f'Сгенерированный комментарий {number}',
+                created=self.start + timedelta(seconds=moment),
+            )
+
+    def run(self):
+        user_ids = self.seed_users()
+        group_ids = self.seed_groups()
+        images = self.seed_images()
+        self.insert(Follow, self.follow_rows(
+            user_ids, ZipfSampler(len(user_ids), self.alpha, self.rng)
+        ))
+        created = array('d')
+        with explicit_created(Post, Comment):
+            start = self.last_pk(Post)
+            self.insert(Post, self.post_rows(
+                user_ids, group_ids, images,
+                ZipfSampler(len(user_ids), self.alpha, self.rng),
+                created,
+            ))
+            post_ids = self.new_ids(Post, start)
+            if post_ids:
+                self.insert(Comment, self.comment_rows(
+                    user_ids, post_ids, created,
+                    ZipfSampler(len(post_ids), self.alpha, self.rng),
+                ))
+        timeline.reclassify(settings.FEED_PULL_THRESHOLD)
+        timeline.rebuild()
+        recount()
+        search.rebuild()
+        cache.clear()
+        return user_ids
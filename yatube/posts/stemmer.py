@@ -0,0 +1,133 @@
+"""Разбиение текста на слова и стемминг русского языка.
+
+Реализация алгоритма Snowball (Портера) для русского языка. Слова на
+других языках только приводятся к нижнему регистру.
+"""
+import re
+
+WORD = re.compile(r'\w+')
+CYRILLIC = re.compile(r'[а-я]')
+VOWELS = 'аеиоуыэюя'
+
+
+def _longest_first(*suffixes):
+    return sorted(suffixes, key=len, reverse=True)
+
+
+PERFECTIVE_GERUND = (
+    _longest_first('в', 'вши', 'вшись'),
+    _longest_first('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = _longest_first(
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    _longest_first('ем', 'нн', 'вш', 'ющ', 'щ'),
+    _longest_first('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = _longest_first('ся', 'сь')
+VERB = (
+    _longest_first(
+        'ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но',
+        'ет', 'ют', 'ны', 'ть', 'ешь', 'нно',
+    ),
+    _longest_first(
+        'ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей',
+        'уй', 'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят',
+        'ует', 'уют', 'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю',
+    ),
+)
+NOUN = _longest_first(
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии',
+    'и', 'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам',
+    'ом', 'о', 'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия',
+    'ья', 'я',
+)
+DERIVATIONAL = _longest_first('ост', 'ость')
+SUPERLATIVE = _longest_first('ейш', 'ейше')
+
+
+def _region(word, start):
+    """Начало области после первой пары «гласная, согласная»."""
+    for index in range(start + 1, len(word)):
+        if word[index] not in VOWELS and word[index - 1] in VOWELS:
+            return index + 1
+    return len(word)
+
+
+def _strip(word, start, suffixes):
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= start:
+            return word[:-len(suffix)]
+    return None
+
+
+def _strip_grouped(word, start, groups):
+    """Первая группа окончаний снимается только после «а» или «я»."""
+    after_a, plain = groups
+    for suffix in after_a:
+        stem = word[:-len(suffix)]
+        if (
+            word.endswith(suffix)
+            and len(stem) - 1 >= start
+            and stem[-1] in 'ая'
+        ):
+            return stem
+    return _strip(word, start, plain)
+
+
+def _strip_adjectival(word, start):
+    stem = _strip(word, start, ADJECTIVE)
+    if stem is None:
+        return None
+    return _strip_grouped(stem, start, PARTICIPLE) or stem
+
+
+def stem(word):
+    """Основа русского слова."""
+    word = word.lower().replace('ё', 'е')
+    rv = next(
+        (index + 1 for index, char in enumerate(word) if char in VOWELS),
+        len(word),
+    )
+    r2 = _region(word, _region(word, 0))
+
+    result = _strip_grouped(word, rv, PERFECTIVE_GERUND)
+    if result is None:
+        word = _strip(word, rv, REFLEXIVE) or word
+        result = (
+            _strip_adjectival(word, rv)
+            or _strip_grouped(word, rv, VERB)
+            or _strip(word, rv, NOUN)
+        )
+    word = result if result is not None else word
+
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+    word = _strip(word, r2, DERIVATIONAL) or word
+
+    if word.endswith('нн') and len(word) - 2 >= rv:
+        return word[:-1]
+    superlative = _strip(word, rv, SUPERLATIVE)
+    if superlative is not None:
+        word = superlative
+        if word.endswith('нн'):
+            word = word[:-1]
+        return word
+    if word.endswith('ь') and len(word) - 1 >= rv:
+        return word[:-1]
+    return word
+
+
+def tokens(text):
+    """Слова текста в нормализованной форме."""
+    result = []
+    for word in WORD.findall(text.lower().replace('ё', 'е')):
+        result.append(stem(word) if CYRILLIC.search(word) else word)
+    return result
+
+
+def normalize(text):
+    return ' '.join(tokens(text))
@@ -0,0 +1,18 @@
+from django import template
+
+from posts import holes
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def hole(context, name, **kwargs):
+    """Персональный фрагмент страницы.
+
+    На кэшируемой странице оставляет метку, которую заполнит
+    ``holes.fill``, на остальных сразу рисует фрагмент.
+    """
+    request = context.get('request')
+    if getattr(request, 'punch_holes', False):
+        return holes.marker(name, **kwargs)
+    return holes.render(request, name, **kwargs)
@@ -0,0 +1,88 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.urls import reverse
+from django.utils.safestring import mark_safe
+
+from core.routers import reads_replicas
+from posts.thumbnails import PENDING_MARKER
+from posts.versions import get_versions, post_scope
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_list.html'
+
+
+def card_key(post, version, show_group):
+    return (
+        f'post_card:{post.pk}:{version}:'
+        f'{post.created.timestamp()}:{int(show_group)}'
+    )
+
+
+class CardRenderer:
+    """Рендерит карточки постов одним скомпилированным шаблоном.
+
+    Шаблон загружается один раз на ленту, а адреса страниц считаются
+    здесь: ``reverse`` профиля и группы выполняется один раз на автора
+    и группу, а не в ``{% url %}`` каждой карточки.
+    """
+
+    def __init__(self, show_group):
+        self.template = get_template(CARD_TEMPLATE)
+        self.show_group = show_group
+        self.urls = {}
+
+    def url(self, name, arg):
+        key = (name, arg)
+        if key not in self.urls:
+            self.urls[key] = reverse(name, args=[arg])
+        return self.urls[key]
+
+    def render(self, post):
+        group_url = None
+        if self.show_group and post.group:
+            group_url = self.url('posts:group_list', post.group.slug)
+        return self.template.render({
+            'post': post,
+            'profile_url': self.url('posts:profile', post.author.username),
+            'detail_url': reverse('posts:post_detail', args=[post.pk]),
+            'group_url': group_url,
+        })
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Список HTML-карточек постов ленты из кэша фрагментов.
+
+    Версии и готовый HTML всех карточек читаются двумя запросами
+    ``get_many``; шаблон рендерится только для промахов.
+    """
+    posts = list(posts)
+    if not posts:
+        return []
+    show_group = not context.get('group')
+    versions = get_versions(*(post_scope(post.pk) for post in posts))
+    keys = [
+        card_key(post, version, show_group)
+        for post, version in zip(posts, versions)
+    ]
+    cards = cache.get_many(keys)
+    missed = {}
+    renderer = None
+    for post, key in zip(posts, keys):
+        if key not in cards:
+            renderer = renderer or CardRenderer(show_group)
+            missed[key] = renderer.render(post)
+    cards.update(missed)
+    # Карточку с заглушкой вместо миниатюры не кэшируем: миниатюра
+    # скоро будет готова.
+    ready = {
+        key: card for key, card in missed.items()
+        if PENDING_MARKER not in card
+    }
+    # Данные с реплики могут отставать от версии поста.
+    if ready and not reads_replicas():
+        cache.set_many(ready, settings.PAGE_CACHE_TIMEOUT)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,29 @@
+from django.test import SimpleTestCase
+
+from posts.management.commands.benchmark import Command, percentile
+
+
+class BenchmarkTests(SimpleTestCase):
+    def test_percentile(self):
+        """Процентили считаются методом ближайшего ранга."""
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 50), 50)
+        self.assertEqual(percentile(values, 95), 95)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_compare_reports_regressions(self):
+        """Сравнение с эталоном находит рост задержки и числа запросов."""
+        baseline = {
+            'index': {'p95_ms': 10.0, 'queries': 3},
+            'profile': {'p95_ms': 10.0, 'queries': 3},
+        }
+        report = {
+            'index': {'p95_ms': 11.0, 'queries': 3},
+            'profile': {'p95_ms': 15.0, 'queries': 4},
+            'search': {'p95_ms': 100.0, 'queries': 10},
+        }
+        regressions = Command().compare(report, baseline, threshold=0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(
+            all(line.startswith('profile') for line in regressions)
+        )
@@ -0,0 +1,116 @@
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import SimpleTestCase, override_settings
+
+from core.cache import Computed, TwoTierCache
+
+SHARED = {
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'two-tier-tests',
+    },
+}
+
+
+@override_settings(CACHES={**SHARED, 'default': SHARED['shared']})
+class TwoTierCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['shared'].clear()
+
+    def process(self, **options):
+        """Кэш отдельного процесса: своя память, общий второй уровень."""
+        options.setdefault('SYNC_INTERVAL', 0)
+        return TwoTierCache('shared', {'OPTIONS': options})
+
+    def test_reads_are_served_from_memory(self):
+        """Прочитанное значение берётся из памяти процесса."""
+        first = self.process()
+        first.set('key', 'value')
+        # В обход журнала: память процесса об этом не узнает.
+        caches['shared'].delete('key')
+        self.assertEqual(first.get('key'), 'value')
+        self.assertIsNone(self.process().get('key'))
+
+    def test_invalidation_reaches_other_processes(self):
+        """Запись, удаление и очистка в одном процессе видны другим."""
+        first, second = self.process(), self.process()
+        first.set('key', 1)
+        self.assertEqual(second.get('key'), 1)
+        first.set('key', 2)
+        self.assertEqual(second.get('key'), 2)
+        first.incr('key')
+        self.assertEqual(second.get_many(['key']), {'key': 3})
+        first.delete('key')
+        self.assertIsNone(second.get('key'))
+        first.set_many({'a': 1, 'b': 2})
+        self.assertEqual(second.get_many(['a', 'b']), {'a': 1, 'b': 2})
+        first.clear()
+        self.assertIsNone(second.get('a'))
+
+    def test_sync_interval_bounds_staleness(self):
+        """Журнал читается не чаще раза в SYNC_INTERVAL."""
+        first, second = self.process(), self.process(SYNC_INTERVAL=60)
+        first.set('key', 1)
+        self.assertEqual(second.get('key'), 1)
+        first.set('key', 2)
+        self.assertEqual(second.get('key'), 1)
+        second._synced_at = 0
+        self.assertEqual(second.get('key'), 2)
+
+    def test_memory_is_lru(self):
+        """Память процесса ограничена и вытесняет давние ключи."""
+        cache = self.process(L1_MAX_ENTRIES=2)
+        for key in ('a', 'b', 'c'):
+            cache.set(key, key)
+        self.assertEqual(list(cache._l1), [
+            cache.make_key('b'), cache.make_key('c'),
+        ])
+
+    def test_values_are_copies(self):
+        """Изменение прочитанного значения не портит кэш."""
+        cache = self.process()
+        cache.set('key', [1])
+        cache.get('key').append(2)
+        self.assertEqual(cache.get('key'), [1])
+
+    def test_get_or_set_computes_once(self):
+        """Одновременные промахи пересчитывают значение один раз."""
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'value'
+
+        results = []
+
+        def worker():
+            results.append(self.process().get_or_set('key', compute, 60))
+
+        threads = [threading.Thread(target=worker) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['value'] * 5)
+
+    def test_early_refresh_probability(self):
+        """Запись пересчитывается заранее тем вероятнее, чем ближе конец."""
+        cache = self.process(EARLY_REFRESH_BETA=1.0)
+        now = time.time()
+        with mock.patch('core.cache.random.random', return_value=0.5):
+            self.assertFalse(cache.should_refresh(Computed(1, 1, now + 60)))
+            self.assertTrue(cache.should_refresh(Computed(1, 1, now + 0.5)))
+        self.assertFalse(cache.should_refresh(Computed(1, 1, None)))
+
+    def test_stale_value_is_served_during_refresh(self):
+        """Пока один пересчитывает запись, другие отдают прежнее значение."""
+        cache = self.process()
+        cache.get_or_set('key', 'old', 60)
+        caches['shared'].add('flight:' + cache.make_key('key'), True)
+        with mock.patch.object(cache, 'should_refresh', return_value=True):
+            self.assertEqual(cache.get_or_set('key', 'new', 60), 'old')
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@mock.patch('posts.views.COMMENTS_IN_PAGE', 3)
+class CommentPagesTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Comment_author')
+        cls.post = Post.objects.create(author=cls.user, text='Пост')
+        cls.other = Post.objects.create(author=cls.user, text='Другой пост')
+        cls.comments = [
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Комментарий {number}'
+            )
+            for number in range(7)
+        ]
+        cls.foreign = Comment.objects.create(
+            post=cls.other, author=cls.user, text='Чужой комментарий'
+        )
+        cls.url = reverse('posts:post_comments', args=[cls.post.pk])
+
+    def setUp(self):
+        self.client = Client()
+
+    def texts(self, response):
+        return [comment.text for comment in response.context['comments']]
+
+    def test_detail_shows_newest_page(self):
+        """На странице поста первая страница новых комментариев."""
+        response = self.client.get(
+            reverse('posts:post_detail', args=[self.post.pk])
+        )
+        self.assertEqual(
+            self.texts(response),
+            ['Комментарий 6', 'Комментарий 5', 'Комментарий 4'],
+        )
+        self.assertEqual(response.context['older_id'], self.comments[4].pk)
+        self.assertIsNone(response.context['newer_id'])
+        older = f'{self.url}?after={self.comments[4].pk}'
+        self.assertContains(response, older)
+
+    def test_fragment_pages_through_older(self):
+        """Фрагмент отдаёт комментарии старше заданного до конца."""
+        response = self.client.get(self.url, {'after': self.comments[4].pk})
+        self.assertEqual(
+            self.texts(response),
+            ['Комментарий 3', 'Комментарий 2', 'Комментарий 1'],
+        )
+        self.assertNotContains(response, '<html')
+        response = self.client.get(self.url, {'after': self.comments[1].pk})
+        self.assertEqual(self.texts(response), ['Комментарий 0'])
+        self.assertIsNone(response.context['older_id'])
+
+    def test_fragment_pages_through_newer(self):
+        """Фрагмент отдаёт комментарии новее заданного."""
+        response = self.client.get(self.url, {'before': self.comments[0].pk})
+        self.assertEqual(
+            self.texts(response),
+            ['Комментарий 3', 'Комментарий 2', 'Комментарий 1'],
+        )
+        self.assertEqual(response.context['newer_id'], self.comments[3].pk)
+        self.assertEqual(response.context['older_id'], self.comments[1].pk)
+
+    def test_fragment_rejects_foreign_or_bad_ids(self):
+        """Id чужого комментария или не число дают 404."""
+        for params in (
+            {'after': self.foreign.pk}, {'before': 'abc'}, {'after': 0},
+        ):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, 404)
@@ -0,0 +1,77 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from posts.models import Comment, Follow, Post, UserCounters
+
+User = get_user_model()
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Counters_author')
+        cls.reader = User.objects.create_user(username='Counters_reader')
+
+    def counters(self, user):
+        return UserCounters.objects.get(user=user)
+
+    def test_post_counter(self):
+        """Счётчик постов меняется при создании и удалении поста."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Post.objects.create(author=self.author, text='Ещё пост')
+        self.assertEqual(self.counters(self.author).posts, 2)
+        post.delete()
+        self.assertEqual(self.counters(self.author).posts, 1)
+
+    def test_follow_counters(self):
+        """Подписка меняет счётчики обоих пользователей."""
+        follow = Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.counters(self.author).followers, 1)
+        self.assertEqual(self.counters(self.reader).following, 1)
+        follow.delete()
+        self.assertEqual(self.counters(self.author).followers, 0)
+        self.assertEqual(self.counters(self.reader).following, 0)
+
+    def test_user_with_posts_and_follows_deleted(self):
+        """Пользователь с постами и подписками удаляется без ошибок."""
+        user = User.objects.create_user(username='Counters_leaving')
+        Post.objects.create(author=user, text='Пост')
+        Follow.objects.create(user=user, author=self.author)
+        Follow.objects.create(user=self.reader, author=user)
+        user.delete()
+        connection.check_constraints()
+        self.assertFalse(UserCounters.objects.filter(user=user.pk).exists())
+        self.assertEqual(self.counters(self.author).followers, 0)
+        self.assertEqual(self.counters(self.reader).following, 0)
+
+    def test_comment_counter_survives_post_edit(self):
+        """Правка поста не затирает счётчик комментариев."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Ого')
+        post.text = 'Исправленный пост'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        self.assertEqual(post.text, 'Исправленный пост')
+
+    def test_recount_repairs_counters(self):
+        """Команда recount восстанавливает разошедшиеся счётчики."""
+        post = Post.objects.create(author=self.author, text='Пост')
+        Comment.objects.create(post=post, author=self.reader, text='Ого')
+        Follow.objects.create(user=self.reader, author=self.author)
+        UserCounters.objects.update(posts=100, followers=100, following=100)
+        Post.objects.update(comments_count=100)
+        call_command('recount', stdout=StringIO())
+        counters = self.counters(self.author)
+        self.assertEqual(
+            (counters.posts, counters.followers, counters.following),
+            (1, 1, 0),
+        )
+        self.assertEqual(self.counters(self.reader).following, 1)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
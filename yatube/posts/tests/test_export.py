@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import shutil
+import tempfile
+import zipfile
+from http import HTTPStatus
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Export_author')
+        cls.other = User.objects.create_user(username='Export_other')
+        group = Group.objects.create(
+            title='Выгрузка', slug='export-slug', description='Выгрузка',
+        )
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост с картинкой', group=group,
+            image=SimpleUploadedFile('export.gif', SMALL_GIF, 'image/gif'),
+        )
+        Post.objects.create(author=cls.author, text='Пост без картинки')
+        Post.objects.create(author=cls.other, text='Чужой пост')
+        Comment.objects.create(
+            post=cls.post, author=cls.author, text='Свой комментарий',
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.author)
+        self.url = reverse('posts:profile_export', args=[self.author])
+
+    def test_jsonl_export(self):
+        """JSONL отдаётся потоком: посты автора, затем комментарии."""
+        response = self.client.get(self.url)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        records = [json.loads(line) for line in lines]
+        self.assertEqual(
+            [(record['type'], record['text']) for record in records],
+            [
+                ('post', 'Пост с картинкой'),
+                ('post', 'Пост без картинки'),
+                ('comment', 'Свой комментарий'),
+            ],
+        )
+        self.assertEqual(records[0]['group'], 'export-slug')
+        self.assertEqual(records[0]['image'], self.post.image.name)
+
+    def test_zip_export(self):
+        """ZIP содержит JSONL и картинки постов."""
+        response = self.client.get(self.url, {'format': 'zip'})
+        archive = zipfile.ZipFile(
+            io.BytesIO(b''.join(response.streaming_content))
+        )
+        self.assertEqual(
+            archive.namelist(),
+            ['posts.jsonl', f'images/{self.post.image.name}'],
+        )
+        self.assertEqual(
+            archive.read(f'images/{self.post.image.name}'), SMALL_GIF
+        )
+        self.assertEqual(
+            len(archive.read('posts.jsonl').decode().splitlines()), 3
+        )
+
+    def test_export_permissions(self):
+        """Выгрузку получают только автор и сотрудники."""
+        self.assertEqual(
+            Client().get(self.url).status_code, HTTPStatus.FOUND
+        )
+        other = Client()
+        other.force_login(self.other)
+        self.assertEqual(
+            other.get(self.url).status_code, HTTPStatus.FORBIDDEN
+        )
+        self.other.is_staff = True
+        self.other.save()
+        self.assertEqual(other.get(self.url).status_code, HTTPStatus.OK)
+
+    def test_export_command(self):
+        """Команда export_posts пишет архив в файл."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'export.zip')
+        call_command(
+            'export_posts', self.author.username, format='zip', output=path,
+        )
+        with zipfile.ZipFile(path) as archive:
+            self.assertIn('posts.jsonl', archive.namelist())
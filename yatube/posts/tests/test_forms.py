@@ -125,7 +125,7 @@ class PostCreateFormTests(TestCase):
         """Шаблон index сформирован с картинкой."""
         response = self.authorized_client.get(reverse('posts:index'))
         post = response.context['page_obj'][0].image.name
-        self.assertEqual(post, 'posts/small.gif')
+        self.assertEqual(post, self.post.image.name)
 
     def test_img_context_profile(self):
         """Шаблон profile сформирован с картинкой."""
@@ -138,7 +138,7 @@ class PostCreateFormTests(TestCase):
             )
         )
         post = response.context['page_obj'][0].image.name
-        self.assertEqual(post, 'posts/small.gif')
+        self.assertEqual(post, self.post.image.name)
 
     def test_img_context_group(self):
         """Шаблон group сформирован с картинкой."""
@@ -151,7 +151,7 @@ class PostCreateFormTests(TestCase):
             )
         )
         post = response.context['page_obj'][0].image.name
-        self.assertEqual(post, 'posts/small.gif')
+        self.assertEqual(post, self.post.image.name)
 
     def test_img_context_detail(self):
         """Шаблон detail сформирован с картинкой."""
@@ -164,7 +164,7 @@ class PostCreateFormTests(TestCase):
             )
         )
         post = response.context['post'].image.name
-        self.assertEqual(post, 'posts/small.gif')
+        self.assertEqual(post, self.post.image.name)
 
 
 class CommentFormTests(TestCase):
@@ -0,0 +1,170 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import (
+    Client,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import reverse
+
+from posts.graph import LOG_PREFIX, VERSION_KEY, FollowGraph, graph
+from posts.models import Follow
+
+User = get_user_model()
+
+
+class FollowGraphTests(TransactionTestCase):
+    # Граф меняется после фиксации транзакции, а TestCase её не фиксирует.
+
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(username=f'graph_{number}')
+            for number in range(5)
+        ]
+        # Новый счётчик версии: граф перечитает подписки этого теста.
+        cache.clear()
+
+    def follow(self, user, author):
+        return Follow.objects.create(
+            user=self.users[user], author=self.users[author]
+        )
+
+    def ids(self, *numbers):
+        return [self.users[number].pk for number in numbers]
+
+    def test_signals_update_graph(self):
+        """Подписка и отписка сразу видны в графе."""
+        first, second = self.ids(0, 1)
+        follow = self.follow(0, 1)
+        self.assertTrue(graph.follows(first, second))
+        self.assertFalse(graph.follows(second, first))
+        self.assertEqual(graph.following(first), [second])
+        self.assertEqual(graph.followers(second), [first])
+        follow.delete()
+        self.assertFalse(graph.follows(first, second))
+        self.assertEqual(graph.followers(second), [])
+
+    def test_rolled_back_follow_not_in_graph(self):
+        """Подписка из отменённой транзакции не попадает в граф."""
+        graph.follows(*self.ids(0, 1))
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.follow(0, 1)
+                raise RuntimeError
+        self.assertFalse(graph.follows(*self.ids(0, 1)))
+        self.assertFalse(FollowGraph().follows(*self.ids(0, 1)))
+
+    def test_reload_after_max_age(self):
+        """Подписки в обход сигналов видны после FOLLOW_GRAPH_MAX_AGE."""
+        self.assertFalse(graph.follows(*self.ids(0, 1)))
+        Follow.objects.bulk_create([
+            Follow(user=self.users[0], author=self.users[1]),
+        ])
+        self.assertFalse(graph.follows(*self.ids(0, 1)))
+        with override_settings(FOLLOW_GRAPH_MAX_AGE=0):
+            self.assertTrue(graph.follows(*self.ids(0, 1)))
+
+    def test_mutual(self):
+        """Взаимные подписки — пересечение подписок и подписчиков."""
+        self.follow(0, 1)
+        self.follow(1, 0)
+        self.follow(0, 2)
+        self.follow(3, 0)
+        self.assertEqual(graph.mutual(self.users[0].pk), self.ids(1))
+
+    def test_suggestions(self):
+        """Предлагаются авторы, которых читают подписки пользователя."""
+        self.follow(0, 1)
+        self.follow(0, 2)
+        self.follow(1, 3)
+        self.follow(2, 3)
+        self.follow(1, 4)
+        self.follow(1, 2)
+        self.follow(2, 0)
+        self.assertEqual(
+            graph.suggestions(self.users[0].pk, 5), self.ids(3, 4)
+        )
+        self.assertEqual(graph.suggestions(self.users[0].pk, 1), self.ids(3))
+
+    def test_suggestions_without_follows(self):
+        """Без подписок предлагаются самые читаемые авторы."""
+        self.follow(1, 2)
+        self.follow(3, 2)
+        self.follow(1, 3)
+        self.follow(2, 4)
+        self.assertEqual(
+            graph.suggestions(self.users[4].pk, 2), self.ids(2, 3)
+        )
+
+    def test_other_process_applies_changes(self):
+        """Другой процесс применяет изменения из журнала без базы."""
+        other = FollowGraph()
+        self.assertFalse(other.follows(*self.ids(0, 1)))
+        follow = self.follow(0, 1)
+        self.follow(2, 1)
+        with mock.patch.object(other, '_load') as load:
+            self.assertTrue(other.follows(*self.ids(0, 1)))
+            self.assertEqual(other.followers(self.users[1].pk), self.ids(0, 2))
+            follow.delete()
+            self.assertFalse(other.follows(*self.ids(0, 1)))
+        load.assert_not_called()
+
+    def test_other_process_reloads_without_log(self):
+        """Без сообщения журнала другой процесс перечитывает граф."""
+        other = FollowGraph()
+        other.follows(*self.ids(0, 1))
+        self.follow(0, 1)
+        cache.delete(f'{LOG_PREFIX}:{cache.get(VERSION_KEY)}')
+        with mock.patch.object(
+            other, '_load', wraps=other._load
+        ) as load:
+            self.assertTrue(other.follows(*self.ids(0, 1)))
+        load.assert_called_once()
+
+    def test_reload_after_cache_clear(self):
+        """Подписки в обход сигналов видны после очистки кэша."""
+        self.assertEqual(graph.following(self.users[0].pk), [])
+        Follow.objects.bulk_create([
+            Follow(user=self.users[0], author=self.users[1]),
+        ])
+        cache.clear()
+        self.assertEqual(graph.following(self.users[0].pk), self.ids(1))
+
+
+class SuggestionsBlockTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='block_reader')
+        cls.friend = User.objects.create_user(username='block_friend')
+        cls.author = User.objects.create_user(username='block_author')
+        Follow.objects.create(user=cls.reader, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def test_suggestions_shown(self):
+        """Блок «Кого почитать» есть в профиле и в ленте подписок."""
+        author_url = reverse('posts:profile', args=[self.author.username])
+        for url in (
+            reverse('posts:profile', args=[self.friend.username]),
+            reverse('posts:follow_index'),
+        ):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Кого почитать')
+                self.assertContains(response, author_url)
+
+    def test_no_suggestions_for_guest(self):
+        """Гостю блок не показывается."""
+        response = Client().get(
+            reverse('posts:profile', args=[self.friend.username])
+        )
+        self.assertNotContains(response, 'Кого почитать')
@@ -0,0 +1,84 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post
+
+User = get_user_model()
+
+
+class HolePunchingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='hole_author')
+        cls.reader = User.objects.create_user(username='hole_reader')
+        cls.post = Post.objects.create(
+            author=cls.author, text='<!--hole:header?-->',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_page_is_shared_by_guests_and_users(self):
+        """Гость и пользователи читают одну запись, шапка у каждого своя."""
+        url = reverse('posts:index')
+        self.assertContains(self.guest.get(url), 'Войти')
+        response = self.reader_client.get(url)
+        self.assertTemplateNotUsed(response, 'posts/index.html')
+        self.assertContains(response, 'Пользователь: hole_reader')
+        self.assertContains(response, 'Избранные авторы')
+        self.assertNotContains(response, 'Войти')
+
+    def test_query_string_is_cached_separately(self):
+        """Страницы ленты с разными параметрами кэшируются отдельно."""
+        url = reverse('posts:index')
+        self.guest.get(url)
+        response = self.guest.get(url, {'page': 2})
+        self.assertTemplateUsed(response, 'posts/index.html')
+
+    def test_profile_actions(self):
+        """Кнопка подписки и выгрузка зависят от пользователя."""
+        url = reverse('posts:profile', args=[self.author.username])
+        export_url = reverse(
+            'posts:profile_export', args=[self.author.username]
+        )
+        response = self.guest.get(url)
+        self.assertContains(response, 'Подписаться')
+        self.assertNotContains(response, export_url)
+        response = self.reader_client.get(url)
+        self.assertTemplateNotUsed(response, 'posts/profile.html')
+        self.assertContains(response, 'Отписаться')
+        response = self.author_client.get(url)
+        self.assertContains(response, export_url)
+        self.assertNotContains(response, 'Подписаться')
+
+    def test_post_actions(self):
+        """Редактировать пост и комментировать могут только свои."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        edit_url = reverse('posts:post_edit', args=[self.post.pk])
+        comment_url = reverse('posts:add_comment', args=[self.post.pk])
+        response = self.guest.get(url)
+        self.assertNotContains(response, edit_url)
+        self.assertNotContains(response, comment_url)
+        response = self.reader_client.get(url)
+        self.assertTemplateNotUsed(response, 'posts/post_detail.html')
+        self.assertNotContains(response, edit_url)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.assertContains(self.author_client.get(url), edit_url)
+
+    def test_user_content_is_not_filled(self):
+        """Метка в тексте поста экранирована и остаётся текстом."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        # Первый ответ отрисован, второй взят из кэша.
+        for _ in range(2):
+            response = self.guest.get(url)
+            self.assertContains(response, '&lt;!--hole:header?--&gt;')
+            self.assertNotContains(response, '<!--hole:')
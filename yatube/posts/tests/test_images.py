@@ -0,0 +1,76 @@
+import io
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from posts.forms import PostForm
+
+ORIENTATION = 0x0112
+
+
+def image_file(name, size, mode='RGB', format='JPEG', **options):
+    buffer = io.BytesIO()
+    Image.new(mode, size).save(buffer, format, **options)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@override_settings(IMAGE_MAX_SIDE=100, IMAGE_WORKERS=0)
+class ImageIngestionTests(SimpleTestCase):
+    def clean(self, upload):
+        form = PostForm(data={'text': 'Пост'}, files={'image': upload})
+        form.is_valid()
+        return form
+
+    def test_photo_is_rotated_resized_and_stripped(self):
+        """Фото поворачивается по EXIF, уменьшается и теряет метаданные."""
+        exif = Image.Exif()
+        exif[ORIENTATION] = 6
+        exif[0x010F] = 'Phone'
+        form = self.clean(image_file('IMG_1.JPG', (400, 200), exif=exif))
+        image = form.cleaned_data['image']
+        self.assertEqual(image.name, 'IMG_1.jpg')
+        with Image.open(image) as result:
+            self.assertEqual(result.format, 'JPEG')
+            self.assertEqual(result.size, (50, 100))
+            self.assertEqual(dict(result.getexif()), {})
+            self.assertTrue(result.info.get('progressive'))
+
+    def test_transparent_image_stays_png(self):
+        """Картинка с прозрачностью сохраняется в PNG."""
+        form = self.clean(
+            image_file('logo.png', (200, 200), mode='RGBA', format='PNG')
+        )
+        with Image.open(form.cleaned_data['image']) as result:
+            self.assertEqual(result.format, 'PNG')
+            self.assertEqual(result.mode, 'RGBA')
+
+    def test_animated_gif_is_kept(self):
+        """Анимированная картинка не пережимается."""
+        buffer = io.BytesIO()
+        frames = [Image.new('P', (10, 10), color) for color in (1, 2)]
+        frames[0].save(
+            buffer, 'GIF', save_all=True, append_images=frames[1:]
+        )
+        upload = SimpleUploadedFile('cat.gif', buffer.getvalue())
+        form = self.clean(upload)
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    @override_settings(IMAGE_MAX_UPLOAD_SIZE=100)
+    def test_large_file_is_rejected(self):
+        """Слишком большой файл не проходит проверку."""
+        form = self.clean(image_file('big.jpg', (50, 50)))
+        self.assertEqual(form.errors['image'][0], 'Файл больше 0 МБ.')
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_large_image_is_rejected(self):
+        """Картинка с большим числом пикселей не проходит проверку."""
+        form = self.clean(image_file('big.jpg', (20, 20)))
+        self.assertIn('20×20', form.errors['image'][0])
+
+    @override_settings(IMAGE_WORKERS=1)
+    def test_pool_reencodes(self):
+        """Пережатие в пуле процессов даёт тот же результат."""
+        form = self.clean(image_file('pool.jpg', (300, 300)))
+        with Image.open(form.cleaned_data['image']) as result:
+            self.assertEqual(result.size, (100, 100))
@@ -0,0 +1,139 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from posts.models import (
+    Follow,
+    Group,
+    ImportCheckpoint,
+    Post,
+    TimelineEntry,
+)
+from posts.search import search_posts
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, IMAGE_WORKERS=0)
+class ImportPostsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Import_author')
+        cls.reader = User.objects.create_user(username='Import_reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.group = Group.objects.create(
+            title='Импорт', slug='import-slug', description='Импорт',
+        )
+        cls.source_dir = tempfile.mkdtemp()
+        with open(os.path.join(cls.source_dir, 'cat.gif'), 'wb') as file:
+            file.write(SMALL_GIF)
+        with open(os.path.join(cls.source_dir, 'fake.gif'), 'wb') as file:
+            file.write(b'not an image')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        shutil.rmtree(cls.source_dir, ignore_errors=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.source_dir, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def run_import(self, path, **options):
+        call_command('import_posts', path, stdout=StringIO(), **options)
+
+    def test_jsonl_import(self):
+        """JSONL импортируется с группами, картинками и датами."""
+        records = [
+            {
+                'author': 'Import_author', 'text': 'Кот на диване',
+                'group': 'import-slug', 'image': 'cat.gif',
+                'created': '2020-01-02T03:04:05+00:00',
+            },
+            {'author': 'Import_author', 'text': 'Второй пост'},
+            {'author': 'Nobody', 'text': 'Пост без автора'},
+            {'author': 'Import_author', 'text': 'Пост', 'group': 'missing'},
+            'не объект',
+            {'author': 'Import_author', 'text': 5},
+            {'author': 'Import_author', 'text': 'Пост', 'created': 17},
+            {'author': ['Import_author'], 'text': 'Пост'},
+            {'author': 'Import_author', 'text': 'Пост', 'group': {}},
+            {'author': 'Import_author', 'text': 'Пост', 'image': 1},
+            {'author': 'Import_author', 'text': 'Пост', 'image': __file__},
+            {
+                'author': 'Import_author', 'text': 'Пост',
+                'image': os.path.relpath(__file__, self.source_dir),
+            },
+            {'author': 'Import_author', 'text': 'Пост', 'image': 'fake.gif'},
+        ]
+        path = self.write('posts.jsonl', '\n'.join(
+            json.dumps(record, ensure_ascii=False) for record in records
+        ) + '\n{broken\n')
+        self.run_import(path, batch_size=2)
+
+        self.assertEqual(Post.objects.count(), 2)
+        post = Post.objects.get(text='Кот на диване')
+        self.assertEqual(post.group, self.group)
+        # Картинка пережата, как при загрузке через форму.
+        self.assertRegex(post.image.name, r'^posts/\w\w/\w\w/\w{64}\.jpg$')
+        self.assertEqual(post.created.year, 2020)
+        self.assertEqual(
+            TimelineEntry.objects.filter(user=self.reader).count(), 2
+        )
+        self.assertEqual(self.author.counters.posts, 2)
+        self.assertEqual(search_posts('коты').count(), 1)
+        checkpoint = ImportCheckpoint.objects.get(source=path)
+        self.assertEqual(checkpoint.position, 14)
+
+    def test_csv_import_creates_authors(self):
+        """CSV читается, а --create-authors создаёт новых авторов."""
+        path = self.write(
+            'posts.csv',
+            'author,text,group\n'
+            'Import_author,Первый,import-slug\n'
+            'New_author,"Текст, с запятой",\n',
+        )
+        self.run_import(path, create_authors=True)
+        self.assertEqual(Post.objects.count(), 2)
+        new_post = Post.objects.get(author__username='New_author')
+        self.assertEqual(new_post.text, 'Текст, с запятой')
+        self.assertIsNone(new_post.group)
+
+    def test_resume_without_duplicates(self):
+        """Импорт продолжается с сохранённой позиции без дублей."""
+        path = self.write('resume.jsonl', '\n'.join(
+            json.dumps({'author': 'Import_author', 'text': f'Пост {number}'})
+            for number in range(5)
+        ))
+        ImportCheckpoint.objects.create(source=path, position=3)
+        self.run_import(path)
+        self.assertEqual(
+            sorted(Post.objects.values_list('text', flat=True)),
+            ['Пост 3', 'Пост 4'],
+        )
+        self.run_import(path)
+        self.assertEqual(Post.objects.count(), 2)
+        self.run_import(path, restart=True)
+        self.assertEqual(Post.objects.count(), 7)
@@ -0,0 +1,127 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import jobs
+from core.models import Job
+
+calls = []
+
+
+def record(value):
+    calls.append(value)
+
+
+def explode():
+    raise RuntimeError('сбой')
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_eager_mode_runs_immediately(self):
+        """Без отдельного воркера задача выполняется сразу."""
+        jobs.enqueue(record, 'сразу')
+        self.assertEqual(calls, ['сразу'])
+        self.assertFalse(Job.objects.exists())
+
+    def test_eager_failure_queued_for_retry(self):
+        """Упавшая на месте задача ставится в очередь для повтора."""
+        with self.assertLogs('core.jobs', 'ERROR'):
+            job = jobs.enqueue(explode)
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('RuntimeError', job.last_error)
+        self.assertGreater(job.run_at, timezone.now())
+
+    def test_not_eager_job_waits_for_worker(self):
+        """Задача с eager=False не выполняется на месте."""
+        jobs.enqueue(record, 1, eager=False)
+        self.assertEqual(calls, [])
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+    @mock.patch('core.jobs.is_eager', return_value=False)
+    def test_worker_runs_queued_jobs(self, is_eager):
+        """Воркер выполняет задачи из базы и удаляет выполненные."""
+        jobs.enqueue(record, 1)
+        jobs.enqueue(record, 2, queue='feeds')
+        jobs.enqueue(record, 3, delay=60)
+        self.assertEqual(calls, [])
+        worker = jobs.Worker({'default': 2, 'feeds': 1}, workers=2)
+        worker.run(once=True)
+        self.assertEqual(sorted(calls), [1, 2])
+        self.assertEqual(worker.processed, 2)
+        self.assertEqual(
+            Job.objects.get().payload, '{"args": [3], "kwargs": {}}'
+        )
+
+    @mock.patch('core.jobs.is_eager', return_value=False)
+    def test_unique_key(self, is_eager):
+        """Задача с тем же ключом не ставится повторно."""
+        jobs.enqueue(record, 1, key='same')
+        jobs.enqueue(record, 1, key='same')
+        self.assertEqual(Job.objects.count(), 1)
+
+    @mock.patch('core.jobs.is_eager', return_value=False)
+    def test_skip_failed(self, is_eager):
+        """Со skip_failed задача, исчерпавшая попытки, не ставится снова."""
+        jobs.enqueue(record, 1, key='broken')
+        Job.objects.update(status=Job.FAILED)
+        jobs.enqueue(record, 1, key='broken', skip_failed=True)
+        self.assertEqual(Job.objects.count(), 1)
+        jobs.enqueue(record, 1, key='broken')
+        self.assertEqual(Job.objects.count(), 2)
+
+    @mock.patch('core.jobs.is_eager', return_value=False)
+    def test_retries_with_backoff(self, is_eager):
+        """Упавшая задача повторяется с паузой, затем помечается ошибкой."""
+        job = jobs.enqueue(explode, max_attempts=2)
+        jobs.claim('default', limit=1, capacity=1)
+        with self.assertLogs('core.jobs', 'WARNING'):
+            self.assertFalse(jobs.execute(job.pk))
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.QUEUED)
+        self.assertEqual(job.attempts, 1)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('RuntimeError', job.last_error)
+
+        Job.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        jobs.claim('default', limit=1, capacity=1)
+        with self.assertLogs('core.jobs', 'WARNING'):
+            jobs.execute(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    @mock.patch('core.jobs.is_eager', return_value=False)
+    def test_queue_concurrency_limit(self, is_eager):
+        """Лимит очереди учитывает уже выполняющиеся задачи."""
+        for number in range(3):
+            jobs.enqueue(record, number, queue='email')
+        self.assertEqual(len(jobs.claim('email', limit=1, capacity=4)), 1)
+        self.assertEqual(jobs.claim('email', limit=1, capacity=4), [])
+        self.assertEqual(len(jobs.claim('email', limit=2, capacity=4)), 1)
+
+    @mock.patch('core.jobs.is_eager', return_value=False)
+    def test_stale_jobs_are_requeued(self, is_eager):
+        """Задачи зависшего воркера возвращаются в очередь."""
+        job = jobs.enqueue(record, 1)
+        jobs.claim('default', limit=1, capacity=1)
+        Job.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(days=1)
+        )
+        self.assertEqual(jobs.requeue_stale(), 1)
+        self.assertEqual(Job.objects.get().status, Job.QUEUED)
+
+    @override_settings(
+        EMAIL_BACKEND='core.mail.QueuedEmailBackend',
+        QUEUED_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    )
+    def test_queued_email(self):
+        """Письмо уходит через очередь настоящим бэкендом."""
+        mail.send_mail('Тема', 'Текст', 'from@example.com', ['to@example.com'])
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].subject, 'Тема')
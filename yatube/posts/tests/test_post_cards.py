@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import Context
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group, Post
+from posts.templatetags import post_cards as post_cards_module
+from posts.templatetags.post_cards import CARD_TEMPLATE, post_cards
+
+User = get_user_model()
+
+
+class PostCardsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Cards_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='cards-slug',
+            description='Тестовое описание',
+        )
+        cls.posts = [
+            Post.objects.create(
+                author=cls.user, group=cls.group, text=f'Карточка {number}'
+            )
+            for number in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def test_cards_rendered_once(self):
+        """Повторный вывод ленты берёт карточки из кэша."""
+        with self.assertTemplateUsed(CARD_TEMPLATE):
+            first = post_cards(Context(), self.posts)
+        with self.assertTemplateNotUsed(CARD_TEMPLATE):
+            second = post_cards(Context(), self.posts)
+        self.assertEqual(first, second)
+        for post, card in zip(self.posts, second):
+            self.assertIn(post.text, card)
+
+    def test_edited_post_rerendered(self):
+        """Правка поста обновляет его карточку."""
+        post_cards(Context(), self.posts)
+        post = self.posts[0]
+        post.text = 'Исправленная карточка'
+        post.save()
+        with self.assertTemplateUsed(CARD_TEMPLATE):
+            cards = post_cards(Context(), self.posts)
+        self.assertIn('Исправленная карточка', cards[0])
+
+    def test_group_link_hidden_on_group_page(self):
+        """На странице группы ссылка на группу не выводится."""
+        with_group = post_cards(Context(), self.posts)[0]
+        without_group = post_cards(
+            Context({'group': self.group}), self.posts
+        )[0]
+        self.assertIn('все записи группы', with_group)
+        self.assertNotIn('все записи группы', without_group)
+
+    def test_urls_reversed_once_per_author_and_group(self):
+        """Адреса профиля и группы считаются один раз на ленту."""
+        with mock.patch.object(
+            post_cards_module, 'reverse', wraps=reverse
+        ) as reversed_urls:
+            cards = post_cards(Context(), self.posts)
+        names = [call.args[0] for call in reversed_urls.call_args_list]
+        self.assertEqual(names.count('posts:profile'), 1)
+        self.assertEqual(names.count('posts:group_list'), 1)
+        self.assertEqual(names.count('posts:post_detail'), len(self.posts))
+        profile_url = reverse('posts:profile', args=[self.user.username])
+        for post, card in zip(self.posts, cards):
+            self.assertIn(f'href="{profile_url}"', card)
+            self.assertIn(
+                reverse('posts:post_detail', args=[post.pk]), card
+            )
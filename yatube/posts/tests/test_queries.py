@@ -0,0 +1,103 @@
+from itertools import count
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.queries import QueryBudgetMixin, query_budget
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Budget_reader')
+        cls.author = User.objects.create_user(username='Budget_author')
+        cls.group = Group.objects.create(
+            title='Тестовая группа',
+            slug='budget-slug',
+            description='Тестовое описание',
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Первый пост'
+        )
+        cls.numbers = count()
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def fetch(self, url):
+        def get():
+            cache.clear()
+            self.authorized_client.get(url)
+        return get
+
+    def add_posts(self):
+        for _ in range(4):
+            number = next(self.numbers)
+            author = User.objects.create_user(username=f'Budget_{number}')
+            Post.objects.create(author=author, group=self.group, text='Пост')
+            Post.objects.create(
+                author=self.author, group=self.group, text='Пост'
+            )
+
+    def add_comments(self):
+        for _ in range(4):
+            author = User.objects.create_user(
+                username=f'Budget_{next(self.numbers)}'
+            )
+            Comment.objects.create(
+                post=self.post, author=author, text='Комментарий'
+            )
+
+    def test_feeds_have_constant_queries(self):
+        """Число запросов лент не зависит от числа постов на странице."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:follow_index'),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertQueriesStable(self.fetch(url), self.add_posts)
+
+    def test_post_detail_has_constant_queries(self):
+        """Число запросов поста не зависит от числа комментариев."""
+        self.assertQueriesStable(
+            self.fetch(reverse('posts:post_detail', args=[self.post.pk])),
+            self.add_comments,
+        )
+
+    def test_cached_pages_within_budget(self):
+        """Страницы из кэша укладываются в бюджет запросов."""
+        budgets = (
+            (reverse('posts:index'), 2),
+            (reverse('posts:group_list', args=[self.group.slug]), 2),
+            (reverse('posts:profile', args=[self.author.username]), 3),
+            (reverse('posts:follow_index'), 4),
+            (reverse('posts:post_detail', args=[self.post.pk]), 3),
+        )
+        for url, limit in budgets:
+            with self.subTest(url=url):
+                self.authorized_client.get(url)
+                with query_budget(limit):
+                    self.authorized_client.get(url)
+
+    def test_query_budget_exceeded(self):
+        """Превышение бюджета — AssertionError со списком запросов."""
+        with self.assertRaisesMessage(AssertionError, 'при бюджете 0'):
+            with query_budget(0):
+                Post.objects.count()
+
+    @override_settings(DEBUG=True)
+    def test_debug_middleware_reports_query_count(self):
+        """В режиме отладки ответ содержит число SQL-запросов."""
+        response = Client().get(reverse('posts:index'))
+        self.assertTrue(response.has_header('X-Query-Count'))
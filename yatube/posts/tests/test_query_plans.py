@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+def plan_problems(detail):
+    """Полный просмотр таблицы без индекса или сортировка в памяти."""
+    if detail.startswith('SCAN ') and 'INDEX' not in detail:
+        return True
+    return 'USE TEMP B-TREE' in detail
+
+
+class QueryPlanTests(TestCase):
+    """Запросы страниц идут по индексам.
+
+    Поиск сюда не входит: результаты упорядочены по релевантности и
+    сортируются всегда.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Plan_reader')
+        cls.author = User.objects.create_user(username='Plan_author')
+        cls.group = Group.objects.create(
+            title='Планы', slug='plan-slug', description='Планы',
+        )
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.post = Post.objects.create(
+            author=cls.author, group=cls.group, text='Пост',
+        )
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.reader, text='Комментарий',
+        )
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def capture(self, url, params):
+        queries = []
+
+        def collect(execute, sql, sql_params, many, context):
+            if sql.lstrip().upper().startswith('SELECT'):
+                queries.append((sql, sql_params))
+            return execute(sql, sql_params, many, context)
+
+        cache.clear()
+        with connection.execute_wrapper(collect):
+            self.client.get(url, params)
+        return queries
+
+    def plan(self, sql, params):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            return [row[-1] for row in cursor.fetchall()]
+
+    def test_pages_use_indexes(self):
+        """Ленты, профиль, пост и комментарии не сортируют в памяти."""
+        pages = [
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.author.username]),
+            reverse('posts:follow_index'),
+        ]
+        requests = [(url, {}) for url in pages] + [
+            (url, {'page': 1}) for url in pages
+        ] + [
+            (reverse('posts:post_detail', args=[self.post.pk]), {}),
+            (
+                reverse('posts:post_comments', args=[self.post.pk]),
+                {'after': self.comment.pk},
+            ),
+        ]
+        for url, params in requests:
+            with self.subTest(url=url, params=params):
+                queries = self.capture(url, params)
+                self.assertTrue(queries)
+                for sql, sql_params in queries:
+                    plan = self.plan(sql, sql_params)
+                    self.assertFalse(
+                        any(plan_problems(detail) for detail in plan),
+                        f'{sql}\n{plan}',
+                    )
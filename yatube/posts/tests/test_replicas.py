@@ -0,0 +1,104 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    TransactionTestCase,
+    override_settings,
+)
+
+from core.middleware import ReplicaMiddleware
+from core.routers import ReplicaRouter, read_from_replicas, reads_replicas
+from posts.models import Post
+from posts.templatetags.post_cards import post_cards
+from posts.versions import GLOBAL, versioned_cache_page
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica1'])
+class ReplicaRoutingTests(TransactionTestCase):
+    # TestCase держит тест в транзакции, а в ней роутер всегда выбирает
+    # основную базу.
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.reads = []
+
+    def view(self, write=False):
+        def get_response(request):
+            self.reads.append(self.router.db_for_read(Post))
+            if write:
+                self.router.db_for_write(Post)
+                self.reads.append(self.router.db_for_read(Post))
+            return HttpResponse()
+        return get_response
+
+    def test_reads_outside_requests_use_primary(self):
+        """Команды и задачи читают основную базу."""
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with read_from_replicas():
+            self.assertEqual(self.router.db_for_read(Post), 'replica1')
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_safe_request_reads_replica(self):
+        """GET читает реплику и не получает cookie."""
+        response = ReplicaMiddleware(self.view())(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica1'])
+        self.assertNotIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+    def test_unsafe_request_reads_primary(self):
+        """POST читает основную базу и закрепляет клиента за ней."""
+        response = ReplicaMiddleware(self.view(write=True))(
+            self.factory.post('/')
+        )
+        self.assertEqual(self.reads, ['default', 'default'])
+        self.assertIn(settings.REPLICA_STICKY_COOKIE, response.cookies)
+
+    def test_write_sticks_to_primary(self):
+        """После записи чтение идёт с основной базы до конца окна."""
+        ReplicaMiddleware(self.view(write=True))(self.factory.get('/'))
+        self.assertEqual(self.reads, ['replica1', 'default'])
+        middleware = ReplicaMiddleware(self.view())
+        self.reads = []
+        fresh = self.factory.get('/')
+        fresh.COOKIES[settings.REPLICA_STICKY_COOKIE] = str(time.time() + 5)
+        middleware(fresh)
+        expired = self.factory.get('/')
+        expired.COOKIES[settings.REPLICA_STICKY_COOKIE] = str(time.time())
+        middleware(expired)
+        self.assertEqual(self.reads, ['default', 'replica1'])
+
+    def test_shared_caches_filled_from_primary(self):
+        """Страница для общего кэша рендерится по основной базе."""
+        cache.clear()
+        reads = []
+
+        @versioned_cache_page(lambda request: [GLOBAL])
+        def view(request):
+            reads.append(self.router.db_for_read(Post))
+            return HttpResponse('<p>страница</p>')
+
+        with read_from_replicas():
+            view(self.factory.get('/'))
+            view(self.factory.get('/'))
+        self.assertEqual(reads, ['default'])
+
+    def test_cards_from_replica_not_cached(self):
+        """Карточки, прочитанные с реплики, не попадают в кэш."""
+        cache.clear()
+        author = User.objects.create_user(username='replica_author')
+        posts = list(Post.objects.select_related('author', 'group').filter(
+            pk=Post.objects.create(author=author, text='С реплики').pk
+        ))
+        with read_from_replicas():
+            self.assertTrue(reads_replicas())
+            post_cards({}, posts)
+        with self.assertTemplateUsed('posts/includes/post_list.html'):
+            post_cards({}, posts)
@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+from django.contrib.auth import get_user_model
+from django.test import Client, SimpleTestCase, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.search import search_posts
+from posts.stemmer import normalize, stem
+
+User = get_user_model()
+
+
+class StemmerTests(SimpleTestCase):
+    def test_word_forms_share_stem(self):
+        """Формы одного слова сводятся к одной основе."""
+        self.assertEqual(stem('котами'), stem('кот'))
+        self.assertEqual(stem('красивая'), stem('красивый'))
+        self.assertEqual(stem('Ёлки'), stem('елка'))
+
+    def test_normalize(self):
+        """Текст разбивается на слова, латиница не стеммится."""
+        self.assertEqual(normalize('Книги, Django!'), 'книг django')
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Search_user')
+        cls.cats = Post.objects.create(
+            author=cls.user, text='Кот спит на диване, кот доволен',
+        )
+        cls.dogs = Post.objects.create(
+            author=cls.user, text='Собаки гуляют во дворе',
+        )
+        Comment.objects.create(
+            post=cls.dogs, author=cls.user, text='А у нас живут коты',
+        )
+
+    def found(self, query):
+        results = search_posts(query)
+        return list(results[:results.count()])
+
+    def test_search_by_word_form_ranks_posts(self):
+        """Поиск находит другие формы слова, пост выше комментария."""
+        self.assertEqual(self.found('котами'), [self.cats, self.dogs])
+        self.assertEqual(self.found('собака'), [self.dogs])
+        self.assertEqual(self.found('кот диван'), [self.cats])
+
+    def test_index_follows_edits_and_deletes(self):
+        """Индекс обновляется при правке и удалении."""
+        post = Post.objects.get(pk=self.cats.pk)
+        post.text = 'Попугай кричит'
+        post.save()
+        self.assertEqual(self.found('попугаи'), [post])
+        self.assertEqual(self.found('диван'), [])
+        self.dogs.comments.all().delete()
+        self.assertEqual(self.found('коты'), [])
+        Post.objects.filter(pk=self.dogs.pk).delete()
+        self.assertEqual(self.found('собака'), [])
+
+    def test_search_view(self):
+        """Страница поиска выводит найденные посты и хранит запрос."""
+        for number in range(12):
+            Post.objects.create(author=self.user, text=f'Кошки {number}')
+        response = Client().get(reverse('posts:search'), {'q': 'кошка'})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        page_obj = response.context['page_obj']
+        self.assertEqual(page_obj.paginator.count, 12)
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(
+            response, '?q=%D0%BA%D0%BE%D1%88%D0%BA%D0%B0&amp;page=2'
+        )
+        response = Client().get(
+            reverse('posts:search'), {'q': 'кошка', 'page': 2}
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_empty_query(self):
+        """Пустой запрос ничего не ищет."""
+        response = Client().get(reverse('posts:search'), {'q': ' '})
+        self.assertEqual(len(response.context['page_obj']), 0)
+
+    def test_admin_search_uses_index(self):
+        """Поиск в админке идёт по индексу и понимает формы слов."""
+        admin = User.objects.create_superuser(
+            'Search_admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'коту'}
+        )
+        self.assertEqual(
+            list(response.context['cl'].result_list), [self.cats]
+        )
+
+    def test_admin_search_without_words(self):
+        """Запрос в админке без слов ничего не находит и не падает."""
+        admin = User.objects.create_superuser(
+            'Search_admin', 'admin@example.com', 'password'
+        )
+        client = Client()
+        client.force_login(admin)
+        for term in ('!!!', '-'):
+            with self.subTest(term=term):
+                response = client.get(
+                    reverse('admin:posts_post_changelist'), {'q': term}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.OK)
+                self.assertEqual(list(response.context['cl'].result_list), [])
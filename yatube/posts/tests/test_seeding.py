@@ -0,0 +1,84 @@
+from datetime import datetime, timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+from posts.seeding import Seeder
+
+User = get_user_model()
+
+
+class SeedTests(TestCase):
+    def test_seed_command(self):
+        """Команда seed создаёт данные, ленты и счётчики."""
+        call_command(
+            'seed', users=30, posts=200, comments=100, follows=5,
+            groups=3, days=30, chunk_size=70, stdout=StringIO(),
+        )
+        self.assertEqual(User.objects.count(), 30)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 100)
+        self.assertGreater(Follow.objects.count(), 0)
+        self.assertGreater(
+            Post.objects.values('created').distinct().count(), 100
+        )
+        for comment in Comment.objects.select_related('post')[:20]:
+            self.assertGreaterEqual(comment.created, comment.post.created)
+        follow = Follow.objects.first()
+        expected = min(
+            Post.objects.filter(author=follow.author).count(),
+            settings.TIMELINE_BACKFILL,
+        )
+        self.assertEqual(
+            TimelineEntry.objects.filter(
+                user=follow.user, post__author=follow.author
+            ).count(),
+            expected,
+        )
+        author = Post.objects.first().author
+        self.assertEqual(author.counters.posts, author.posts.count())
+
+    def test_seed_is_deterministic(self):
+        """Одинаковый seed даёт одинаковый граф подписок и посты."""
+        def generate(seed):
+            seeder = Seeder(users=50, posts=100, seed=seed)
+            user_ids = list(range(1, 51))
+            follows = [
+                (row.user_id, row.author_id)
+                for row in seeder.follow_rows(
+                    user_ids, lambda: seeder.rng.randrange(50)
+                )
+            ]
+            posts = [
+                (row.author_id, row.created)
+                for row in seeder.post_rows(
+                    user_ids, [], [], lambda: seeder.rng.randrange(50), []
+                )
+            ]
+            return follows, posts
+
+        self.assertEqual(generate(1), generate(1))
+        self.assertNotEqual(generate(1)[1], generate(2)[1])
+
+    def test_seed_end(self):
+        """Посты seed не позже --end и не раньше --days до него."""
+        call_command(
+            'seed', users=5, posts=50, comments=0, groups=1, days=10,
+            end='2020-06-01T12:00:00', stdout=StringIO(),
+        )
+        end = datetime(2020, 6, 1, 12, tzinfo=timezone.utc)
+        self.assertFalse(Post.objects.filter(created__gt=end).exists())
+        self.assertFalse(Post.objects.filter(
+            created__lt=end - timedelta(days=10)
+        ).exists())
+
+    def test_seed_wrong_end(self):
+        """Неверная дата --end — ошибка команды."""
+        with self.assertRaises(CommandError):
+            call_command('seed', end='вчера', stdout=StringIO())
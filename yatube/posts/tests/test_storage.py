@@ -0,0 +1,107 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from sorl.thumbnail.base import ThumbnailBackend
+
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Storage_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def create_post(self, name, content=SMALL_GIF):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(name, content, 'image/gif'),
+        )
+
+    def files(self):
+        return [
+            os.path.join(root, name)
+            for root, _, names in os.walk(
+                os.path.join(TEMP_MEDIA_ROOT, 'posts')
+            )
+            for name in names
+        ]
+
+    def test_identical_images_are_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом с именем по хэшу."""
+        first = self.create_post('meme.gif')
+        second = self.create_post('MEME_copy.GIF')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertRegex(
+            first.image.name, r'^posts/(\w\w)/(\w\w)/\1\2\w{60}\.gif$'
+        )
+        self.assertEqual(len(self.files()), 1)
+        other = self.create_post('meme.gif', SMALL_GIF + b'\x00')
+        self.assertNotEqual(other.image.name, first.image.name)
+
+    def test_thumbnails_are_shared(self):
+        """Посты с одной картинкой используют общую миниатюру."""
+        first = self.create_post('a.gif')
+        second = self.create_post('b.gif')
+        backend = ThumbnailBackend()
+        self.assertEqual(
+            backend.get_thumbnail(first.image, '10x10').name,
+            backend.get_thumbnail(second.image, '10x10').name,
+        )
+
+    def test_rehash_media(self):
+        """Команда переносит старые файлы под хэш и удаляет дубли."""
+        directory = os.path.join(TEMP_MEDIA_ROOT, 'posts')
+        os.makedirs(directory, exist_ok=True)
+        legacy = SMALL_GIF + b'legacy'
+        for name in ('old1.gif', 'old2.gif'):
+            with open(os.path.join(directory, name), 'wb') as file:
+                file.write(legacy)
+        posts = [
+            Post.objects.create(author=self.user, text='Старый', image=name)
+            for name in ('posts/old1.gif', 'posts/old2.gif', 'posts/gone.gif')
+        ]
+        out = StringIO()
+        call_command('rehash_media', '--dry-run', stdout=out)
+        self.assertIn('из них дублей: 1, нет на диске: 1', out.getvalue())
+        self.assertEqual(
+            len([path for path in self.files() if 'old' in path]), 2
+        )
+
+        call_command('rehash_media', stdout=StringIO())
+        for post in posts:
+            post.refresh_from_db()
+        self.assertEqual(posts[0].image.name, posts[1].image.name)
+        self.assertNotEqual(posts[0].image.name, 'posts/old1.gif')
+        self.assertEqual(posts[2].image.name, 'posts/gone.gif')
+        self.assertEqual(
+            [path for path in self.files() if 'old' in path], []
+        )
+        self.assertEqual(posts[0].image.read(), legacy)
@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from core.models import Job
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Thumb_author')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Картинки хранятся по содержимому: миниатюра той же картинки
+        # могла остаться в кэше sorl-thumbnail от другого теста.
+        cache.clear()
+
+    def create_post(self):
+        return Post.objects.create(
+            author=self.user,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile(
+                name='thumb.gif', content=SMALL_GIF, content_type='image/gif'
+            ),
+        )
+
+    def test_saved_image_schedules_generation(self):
+        """Сохранение картинки ставит генерацию миниатюр в очередь."""
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            post = self.create_post()
+            schedule.assert_called_once_with(post.image.name)
+            schedule.reset_mock()
+            post.text = 'Правка без новой картинки'
+            post.save()
+            schedule.assert_not_called()
+
+    def test_page_shows_placeholder_until_generated(self):
+        """Страница не строит миниатюру сама и выводит заглушку."""
+        with mock.patch('posts.thumbnails.schedule') as schedule:
+            post = self.create_post()
+            url = reverse('posts:post_detail', args=[post.pk])
+            response = Client().get(url)
+        self.assertContains(response, thumbnails.PENDING_MARKER)
+        schedule.assert_called_with(post.image.name, rendering=True)
+        thumbnails.generate(post.image.name)
+        response = Client().get(url)
+        self.assertNotContains(response, thumbnails.PENDING_MARKER)
+        self.assertContains(response, 'class="card-img my-2" src=')
+
+    def test_page_never_generates_thumbnails(self):
+        """Даже без воркера страница только ставит задачу в очередь."""
+        with mock.patch('posts.thumbnails.schedule'):
+            post = self.create_post()
+        with mock.patch.object(
+            thumbnails._generator, 'get_thumbnail'
+        ) as get_thumbnail:
+            response = Client().get(reverse('posts:index'))
+        get_thumbnail.assert_not_called()
+        self.assertContains(response, thumbnails.PENDING_MARKER)
+        self.assertTrue(Job.objects.filter(
+            key=f'thumbnails:{post.image.name}', status=Job.QUEUED
+        ).exists())
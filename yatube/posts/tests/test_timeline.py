@@ -0,0 +1,110 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post, PullAuthor, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username='Timeline_author')
+        cls.reader = User.objects.create_user(username='Timeline_reader')
+        cls.old_post = Post.objects.create(
+            author=cls.author,
+            text='Пост до подписки',
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_follow_backfills_and_unfollow_purges(self):
+        """Подписка заполняет ленту, отписка очищает её."""
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=(self.author.username,))
+        )
+        self.assertTrue(
+            TimelineEntry.objects.filter(
+                user=self.reader, post=self.old_post
+            ).exists()
+        )
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=(self.author.username,))
+        )
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.reader).exists()
+        )
+
+    def test_new_post_fans_out_to_followers(self):
+        """Новый пост попадает в ленты подписчиков."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        entry = TimelineEntry.objects.get(user=self.reader, post=new_post)
+        self.assertEqual(entry.created, new_post.created)
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']), [new_post, self.old_post]
+        )
+
+    def test_follow_feed_page_fallback(self):
+        """Лента подписок поддерживает старые ссылки ?page=."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        response = self.authorized_client.get(
+            reverse('posts:follow_index'), {'page': 1}
+        )
+        self.assertEqual(list(response.context['page_obj']), [self.old_post])
+
+
+class HybridTimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.star = User.objects.create_user(username='Timeline_star')
+        cls.author = User.objects.create_user(username='Timeline_author')
+        cls.reader = User.objects.create_user(username='Timeline_reader')
+        cls.fan = User.objects.create_user(username='Timeline_fan')
+        for user in (cls.reader, cls.fan):
+            Follow.objects.create(user=user, author=cls.star)
+        Follow.objects.create(user=cls.reader, author=cls.author)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+
+    def test_reclassify_moves_author_to_pull_mode(self):
+        """Популярный автор уходит из рассылки и возвращается в неё."""
+        Post.objects.create(author=self.star, text='До классификации')
+        call_command('reclassify_authors', threshold=2, stdout=StringIO())
+        self.assertTrue(PullAuthor.objects.filter(author=self.star).exists())
+        self.assertFalse(
+            TimelineEntry.objects.filter(post__author=self.star).exists()
+        )
+        call_command('reclassify_authors', threshold=3, stdout=StringIO())
+        self.assertFalse(PullAuthor.objects.exists())
+        self.assertEqual(
+            TimelineEntry.objects.filter(post__author=self.star).count(), 2
+        )
+
+    def test_pulled_posts_merged_into_feed(self):
+        """Посты популярного автора подмешиваются в ленту по дате."""
+        PullAuthor.objects.create(author=self.star)
+        posts = [
+            Post.objects.create(author=author, text=f'Пост {number}')
+            for number, author in enumerate(
+                (self.author, self.star, self.author, self.star)
+            )
+        ]
+        self.assertFalse(
+            TimelineEntry.objects.filter(post__author=self.star).exists()
+        )
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            list(response.context['page_obj']), posts[::-1]
+        )
@@ -3,10 +3,13 @@ from http import HTTPStatus
 from django import forms
 from django.contrib.auth import get_user_model
 from django.core.cache import cache
-from django.test import Client, TestCase
+from django.db import transaction
+from django.test import Client, TestCase, TransactionTestCase
 from django.urls import reverse
 
-from posts.models import Group, Post, Follow
+from posts.models import Comment, Follow, Group, Post
+from posts.paginators import CursorPaginator, WindowedPaginator
+from posts.versions import get_versions, post_scope
 
 User = get_user_model()
 
@@ -29,6 +32,8 @@ class PostPagesTests(TestCase):
         )
 
     def setUp(self):
+        # Страницы кэшируются одной записью для всех клиентов.
+        cache.clear()
         self.guest_client = Client()
         # Создаем авторизованный клиент
         self.authorized_client = Client()
@@ -77,17 +82,81 @@ class PostPagesTests(TestCase):
         self.check_post_context_on_page(test_object)
 
     def test_cache_index(self):
+        """Главная страница берётся из кэша до изменения постов."""
         response = self.authorized_client.get(reverse('posts:index'))
+        response_cached = self.authorized_client.get(reverse('posts:index'))
+        self.assertTemplateNotUsed(response_cached, 'posts/index.html')
+        self.assertEqual(response.content, response_cached.content)
         post_deleted = Post.objects.get(id=self.post.pk)
         post_deleted.delete()
-        response_anoth = self.authorized_client.get(reverse('posts:index'))
-        self.assertEqual(response.content, response_anoth.content)
-        cache.clear()
         response_other = self.authorized_client.get(
             reverse('posts:index')
         )
         self.assertNotEqual(response.content, response_other.content)
 
+    def test_cache_invalidated_by_scope(self):
+        """Изменения сбрасывают кэш только своих страниц."""
+        group_url = reverse('posts:group_list', args=[self.group_slug])
+        detail_url = reverse('posts:post_detail', args=[self.post.pk])
+        for url in (detail_url, group_url):
+            self.authorized_client.get(url)
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Свежий комментарий'
+        )
+        self.assertTemplateNotUsed(
+            self.authorized_client.get(group_url), 'posts/group_list.html'
+        )
+        response = self.authorized_client.get(detail_url)
+        self.assertContains(response, 'Свежий комментарий')
+
+    def test_conditional_get(self):
+        """Неизменившиеся страницы отвечают 304 по ETag и дате."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', args=[self.group_slug]),
+            reverse('posts:profile', args=[self.user.username]),
+            reverse('posts:post_detail', args=[self.post.pk]),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                # Первый ответ может выдать cookie CSRF, и ETag сменится.
+                self.authorized_client.get(url)
+                response = self.authorized_client.get(url)
+                etag = response['ETag']
+                self.assertIn('private', response['Cache-Control'])
+                not_modified = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(
+                    not_modified.status_code, HTTPStatus.NOT_MODIFIED
+                )
+                self.assertEqual(not_modified['ETag'], etag)
+                other_user = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(other_user.status_code, HTTPStatus.OK)
+
+    def test_conditional_get_by_date(self):
+        """Запрос без cookie проверяется по дате изменения."""
+        url = reverse('posts:profile', args=[self.user.username])
+        last_modified = Client().get(url)['Last-Modified']
+        response = Client().get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_MODIFIED)
+        self.assertFalse(
+            self.authorized_client.get(url).has_header('Last-Modified')
+        )
+
+    def test_conditional_get_after_change(self):
+        """После изменения данных страница отдаётся заново."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        etag = self.authorized_client.get(url)['ETag']
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Новый комментарий'
+        )
+        response = self.authorized_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertNotEqual(response['ETag'], etag)
+
     def test_posts_group_page_show_correct_context(self):
         """Шаблон group_list сформирован с правильным контекстом."""
         response = self.authorized_client.get(
@@ -301,7 +370,7 @@ class PaginatorTest(TestCase):
         paginator_data = [
             reverse('posts:index'),
             reverse('posts:group_list', args=[self.group.slug]),
-            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
         ]
         for requested_page in paginator_data:
             with self.subTest(requested_page=requested_page):
@@ -322,7 +391,7 @@ class PaginatorTest(TestCase):
         paginator_data = [
             reverse('posts:index'),
             reverse('posts:group_list', args=[self.group.slug]),
-            reverse('posts:group_list', args=[self.group.slug]),
+            reverse('posts:profile', args=[self.user.username]),
         ]
         for requested_page in paginator_data:
             with self.subTest(requested_page=requested_page):
@@ -334,3 +403,89 @@ class PaginatorTest(TestCase):
                     len(response.context['page_obj']),
                     second_page,
                 )
+
+    def test_cursor_paginator_walks_feed(self):
+        """Курсоры ?after=/?before= листают ленту без повторов."""
+        cache.clear()
+        url = reverse('posts:group_list', args=[self.group.slug])
+        first = self.authorized_client.get(url).context['page_obj']
+        self.assertEqual(len(first), self.POSTS_PER_PAGE)
+        next_cursor = first.paginator.next_cursor
+        self.assertIsNotNone(next_cursor)
+        self.assertIsNone(first.paginator.previous_cursor)
+        second = self.authorized_client.get(
+            url, {'after': next_cursor}
+        ).context['page_obj']
+        self.assertEqual(
+            len(second), Post.objects.count() - self.POSTS_PER_PAGE
+        )
+        self.assertIsNone(second.paginator.next_cursor)
+        self.assertFalse(
+            {post.pk for post in first} & {post.pk for post in second}
+        )
+        back = self.authorized_client.get(
+            url, {'before': second.paginator.previous_cursor}
+        ).context['page_obj']
+        self.assertEqual(
+            [post.pk for post in back], [post.pk for post in first]
+        )
+
+    def test_cursor_page_neighbours_without_count(self):
+        """Страница курсора знает соседей без COUNT(*)."""
+        paginator = CursorPaginator(
+            Post.objects.all(), self.POSTS_PER_PAGE
+        )
+        with self.assertNumQueries(1):
+            first = paginator.get_cursor_page()
+            self.assertTrue(first.has_next())
+            self.assertFalse(first.has_previous())
+            self.assertTrue(first.has_other_pages())
+        with self.assertNumQueries(1):
+            last = paginator.get_cursor_page(after=paginator.next_cursor)
+            self.assertFalse(last.has_next())
+            self.assertTrue(last.has_previous())
+
+    def test_cursor_paginator_ignores_broken_token(self):
+        """Испорченный курсор открывает первую страницу."""
+        response = self.authorized_client.get(
+            reverse('posts:group_list', args=[self.group.slug]),
+            {'after': 'не-курсор'},
+        )
+        self.assertEqual(
+            len(response.context['page_obj']), self.POSTS_PER_PAGE
+        )
+
+    def test_windowed_page_range(self):
+        """Пагинатор выводит окно страниц с пропусками."""
+        paginator = WindowedPaginator(range(200), self.POSTS_PER_PAGE)
+        paginator.page(10)
+        self.assertEqual(
+            paginator.window, [1, None, 8, 9, 10, 11, 12, None, 20]
+        )
+        paginator.page(2)
+        self.assertEqual(paginator.window, [1, 2, 3, 4, None, 20])
+
+    def test_windowed_paginator_caches_count(self):
+        """Число постов берётся из кэша, а не из COUNT(*)."""
+        cache.clear()
+        count = WindowedPaginator(Post.objects.all(), 10).count
+        Post.objects.create(author=self.user, text='Новый пост')
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                WindowedPaginator(Post.objects.all(), 10).count, count
+            )
+
+
+class VersionCommitTests(TransactionTestCase):
+    def test_versions_bumped_after_commit(self):
+        """Страница, закэшированная до фиксации, после неё устаревает."""
+        author = User.objects.create_user(username='Commit_author')
+        post = Post.objects.create(author=author, text='До фиксации')
+        scope = post_scope(post.pk)
+        with transaction.atomic():
+            post.text = 'После фиксации'
+            post.save()
+            # Версию в этот момент мог прочитать чужой запрос и закэшировать
+            # под ней старую страницу.
+            [during] = get_versions(scope)
+        self.assertNotEqual(get_versions(scope), [during])
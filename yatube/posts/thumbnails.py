@@ -0,0 +1,80 @@
+"""Генерация миниатюр вне рендеринга страниц.
+
+Все размеры из ``POST_THUMBNAILS`` строятся задачей очереди
+``thumbnails`` сразу после сохранения картинки поста. Тег
+``{% thumbnail %}`` работает через ``DeferredThumbnailBackend``: он
+отдаёт только готовые миниатюры, а для отсутствующих ставит генерацию в
+очередь и выводит заглушку (ветку ``{% empty %}``).
+"""
+from django.conf import settings
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core import jobs
+
+from . import versions
+
+PENDING_MARKER = 'data-thumbnail-pending'
+
+_generator = ThumbnailBackend()
+
+
+def generate(name):
+    """Строит все миниатюры картинки и обновляет кэш её постов."""
+    from .models import Post
+
+    # Ключ миниатюры зависит от хранилища исходника: берём то же, что у
+    # поля, иначе шаблон не найдёт построенную миниатюру.
+    source = ImageFile(name, Post._meta.get_field('image').storage)
+    for geometry, options in settings.POST_THUMBNAILS:
+        _generator.get_thumbnail(source, geometry, **options)
+    for post in Post.objects.filter(image=name).select_related(
+        'author', 'group'
+    ):
+        versions.bump(*versions.post_scopes(post))
+
+
+def schedule(name, rendering=False):
+    """Ставит генерацию миниатюр в очередь задач.
+
+    Со страницы (``rendering``) задача только ставится в очередь, даже
+    при ``JOBS_EAGER``, и не ставится для картинки, генерация которой
+    уже провалилась: иначе каждый показ её карточки добавлял бы задачу.
+    """
+    jobs.enqueue(
+        generate, name, queue='thumbnails', key=f'thumbnails:{name}',
+        skip_failed=rendering, eager=not rendering,
+    )
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который никогда не обрабатывает картинки.
+
+    Возвращает миниатюру из хранилища ключей, а при промахе планирует
+    её генерацию и возвращает ``None``.
+    """
+
+    def _thumbnail_options(self, source, options):
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        source = ImageFile(file_)
+        name = self._get_thumbnail_filename(
+            source, geometry_string, self._thumbnail_options(source, options)
+        )
+        cached = default.kvstore.get(ImageFile(name, default.storage))
+        if cached:
+            return cached
+        schedule(source.name, rendering=True)
+        return None
@@ -0,0 +1,227 @@
+"""Лента подписок: гибрид fan-out on write и чтения по запросу.
+
+Посты обычных авторов раскладываются в ленты всех подписчиков, поэтому
+страница ``follow_index`` читается одним запросом по индексу
+``(user, created)``. Посты авторов из ``PullAuthor`` (у них слишком много
+подписчиков) не копируются, а подмешиваются при чтении слиянием потоков
+по ``created``.
+"""
+import heapq
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count
+from django.utils.functional import cached_property
+
+from .models import Follow, Post, PullAuthor, TimelineEntry
+from .paginators import keyset_slice
+
+
+def _write(entries):
+    TimelineEntry.objects.bulk_create(entries, ignore_conflicts=True)
+
+
+def is_pulled(author_id):
+    return PullAuthor.objects.filter(author_id=author_id).exists()
+
+
+def fan_out(post):
+    """Добавляет пост в ленты всех подписчиков автора."""
+    if is_pulled(post.author_id):
+        return
+    followers = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _write(
+        TimelineEntry(user_id=user_id, post=post, created=post.created)
+        for user_id in followers.iterator()
+    )
+
+
+def fan_out_post(post_id):
+    """Задача очереди ``feeds``: рассылка поста, если он ещё существует."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        fan_out(post)
+
+
+def fan_out_many(posts):
+    """Раскладывает пачку постов по лентам подписчиков их авторов."""
+    by_author = defaultdict(list)
+    for post in posts:
+        by_author[post.author_id].append(post)
+    pulled = PullAuthor.objects.filter(
+        author_id__in=by_author
+    ).values_list('author_id', flat=True)
+    followers = Follow.objects.filter(
+        author_id__in=set(by_author) - set(pulled)
+    ).values_list('user_id', 'author_id')
+    _write(
+        TimelineEntry(user_id=user_id, post=post, created=post.created)
+        for user_id, author_id in followers.iterator()
+        for post in by_author[author_id]
+    )
+
+
+def backfill(user_id, author_id):
+    """Заполняет ленту последними постами автора после подписки."""
+    if is_pulled(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-created', '-pk'
+    ).values_list('pk', 'created')[:settings.TIMELINE_BACKFILL]
+    _write(
+        TimelineEntry(user_id=user_id, post_id=pk, created=created)
+        for pk, created in posts
+    )
+
+
+def purge(user_id, author_id):
+    """Убирает из ленты посты автора после отписки."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+@transaction.atomic
+def rebuild():
+    """Собирает все ленты заново одним запросом ``INSERT ... SELECT``.
+
+    Каждая подписка получает последние ``TIMELINE_BACKFILL`` постов
+    автора, как после ``backfill``. Нужна после массовой загрузки
+    данных, которая обходит сигналы.
+    """
+    TimelineEntry.objects.all().delete()
+    tables = {
+        'entry': TimelineEntry._meta.db_table,
+        'post': Post._meta.db_table,
+        'follow': Follow._meta.db_table,
+        'pulled': PullAuthor._meta.db_table,
+    }
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO {entry} (user_id, post_id, created)
+            SELECT f.user_id, p.id, p.created
+            FROM {follow} f
+            JOIN (
+                SELECT id, author_id, created, ROW_NUMBER() OVER (
+                    PARTITION BY author_id ORDER BY created DESC, id DESC
+                ) AS position
+                FROM {post}
+                WHERE author_id NOT IN (SELECT author_id FROM {pulled})
+            ) p ON p.author_id = f.author_id
+            WHERE p.position <= %s
+            """.format(**tables),
+            [settings.TIMELINE_BACKFILL],
+        )
+
+
+def reclassify(threshold):
+    """Переводит авторов между режимами рассылки и чтения по запросу.
+
+    Возвращает пару множеств ``(pulled, pushed)`` с id авторов, чей
+    режим изменился.
+    """
+    counts = dict(
+        Follow.objects.values('author').annotate(
+            total=Count('pk')
+        ).filter(total__gte=threshold).values_list('author', 'total')
+    )
+    current = set(PullAuthor.objects.values_list('author_id', flat=True))
+    pulled = set(counts) - current
+    pushed = current - set(counts)
+
+    PullAuthor.objects.filter(author_id__in=pushed).delete()
+    PullAuthor.objects.bulk_create(
+        PullAuthor(author_id=author_id, followers=counts[author_id])
+        for author_id in pulled
+    )
+    for author_id in set(counts) & current:
+        PullAuthor.objects.filter(author_id=author_id).update(
+            followers=counts[author_id]
+        )
+    TimelineEntry.objects.filter(post__author_id__in=pulled).delete()
+    follows = Follow.objects.filter(author_id__in=pushed).values_list(
+        'user_id', 'author_id'
+    )
+    for user_id, author_id in follows.iterator():
+        backfill(user_id, author_id)
+    return pulled, pushed
+
+
+def _key(post):
+    return post.created, post.pk
+
+
+class FollowFeed:
+    """Лента подписок пользователя для пагинаторов.
+
+    ``keyset_slice`` сливает материализованную ленту с постами авторов
+    из ``PullAuthor``. Для старых ссылок ``?page=`` поддерживаются
+    ``count()`` и срезы обычного ``Paginator``: без таких авторов они
+    читают материализованную ленту по индексу, иначе сортируют посты
+    всех подписок.
+    """
+    key_fields = ('created', 'post_id')
+
+    def __init__(self, user):
+        self.user = user
+
+    def entries(self):
+        return TimelineEntry.objects.filter(
+            user=self.user
+        ).select_related('post__author', 'post__group')
+
+    @cached_property
+    def pulled_authors(self):
+        return list(Follow.objects.filter(
+            user=self.user, author__pull_author__isnull=False
+        ).values_list('author_id', flat=True))
+
+    def posts(self):
+        return Post.objects.filter(
+            author__following__user=self.user
+        ).select_related('author', 'group')
+
+    def keyset_slice(self, after=None, before=None, limit=10):
+        pushed = [
+            entry.post for entry in keyset_slice(
+                self.entries(), after=after, before=before, limit=limit,
+                fields=self.key_fields,
+            )
+        ]
+        streams = [pushed] + [
+            keyset_slice(
+                Post.objects.filter(author_id=author_id).select_related(
+                    'author', 'group'
+                ),
+                after=after, before=before, limit=limit,
+            )
+            for author_id in self.pulled_authors
+        ]
+        if len(streams) == 1:
+            return pushed
+        merged = []
+        seen = set()
+        for post in heapq.merge(*streams, key=_key, reverse=True):
+            if post.pk not in seen:
+                seen.add(post.pk)
+                merged.append(post)
+        if before is not None:
+            return merged[-limit:]
+        return merged[:limit]
+
+    def count(self):
+        if self.pulled_authors:
+            return self.posts().count()
+        return self.entries().count()
+
+    def __getitem__(self, index):
+        if self.pulled_authors:
+            return self.posts()[index]
+        entries = self.entries().order_by('-created', '-post_id')[index]
+        if isinstance(index, slice):
+            return [entry.post for entry in entries]
+        return entries.post
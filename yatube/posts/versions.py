@@ -0,0 +1,225 @@
+"""Счётчики поколений для инвалидации кэша страниц.
+
+У каждой области (весь сайт, группа, автор, пост) есть номер версии.
+Сигналы увеличивают его при изменении данных, а ключи кэша включают
+текущие номера, поэтому устаревшие записи просто перестают читаться.
+Вместе с версией хранится время последнего изменения области: из них
+строятся ``ETag`` и ``Last-Modified`` для условных GET-запросов.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import (
+    get_conditional_response,
+    patch_cache_control,
+    patch_vary_headers,
+)
+from django.utils.http import http_date
+
+from core.cache import single_flight
+from core.routers import read_from_replicas
+
+from . import holes
+
+GLOBAL = 'global'
+
+
+def group_scope(slug):
+    return f'group:{slug}'
+
+
+def author_scope(username):
+    return f'author:{username}'
+
+
+def post_scope(post_id):
+    return f'post:{post_id}'
+
+
+def post_scopes(post):
+    """Области всех страниц, на которых виден пост."""
+    scopes = [
+        GLOBAL,
+        post_scope(post.pk),
+        author_scope(post.author.username),
+    ]
+    if post.group:
+        scopes.append(group_scope(post.group.slug))
+    return scopes
+
+
+def _version_key(scope):
+    return f'version:{scope}'
+
+
+def _modified_key(scope):
+    return f'modified:{scope}'
+
+
+def _initial():
+    # Номер от текущего времени не совпадёт с версией, вытесненной
+    # из кэша, и старые записи не «оживут» после сброса счётчика.
+    return int(time.time() * 1000)
+
+
+def get_versions(*scopes):
+    """Возвращает текущие номера версий областей в том же порядке."""
+    keys = [_version_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: _initial() for key in keys if key not in found}
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    return [found[key] for key in keys]
+
+
+def get_state(*scopes):
+    """Номера версий областей и время последнего изменения любой из них.
+
+    Версии и времена читаются одним запросом к кэшу. Если время не
+    известно, изменение считается только что случившимся.
+    """
+    version_keys = [_version_key(scope) for scope in scopes]
+    modified_keys = [_modified_key(scope) for scope in scopes]
+    found = cache.get_many(version_keys + modified_keys)
+    now = time.time()
+    missing = {key: _initial() for key in version_keys if key not in found}
+    missing.update(
+        (key, now) for key in modified_keys if key not in found
+    )
+    if missing:
+        cache.set_many(missing, None)
+        found.update(missing)
+    versions = [found[key] for key in version_keys]
+    modified = max((found[key] for key in modified_keys), default=now)
+    return versions, modified
+
+
+def bump(*scopes):
+    """Делает недействительными все записи кэша указанных областей."""
+    for scope in scopes:
+        key = _version_key(scope)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial(), None)
+    now = time.time()
+    cache.set_many({_modified_key(scope): now for scope in scopes}, None)
+
+
+def bump_on_commit(*scopes):
+    """``bump`` для изменений внутри транзакции.
+
+    Версии меняются сразу, чтобы транзакция видела свои изменения, и
+    ещё раз после фиксации: страницу, отрисованную между ними по старым
+    данным, иначе читали бы под новой версией до истечения кэша.
+    """
+    bump(*scopes)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump(*scopes))
+
+
+def make_key(prefix, scopes, *parts):
+    """Ключ кэша, который меняется вместе с версиями областей."""
+    return _make_key(prefix, get_versions(*scopes), *parts)
+
+
+def _make_key(prefix, versions, *parts):
+    versions = '.'.join(str(version) for version in versions)
+    key = f'{prefix}:{versions}'
+    if parts:
+        digest = hashlib.md5(
+            ':'.join(str(part) for part in parts).encode()
+        ).hexdigest()
+        key = f'{key}:{digest}'
+    return key
+
+
+def make_etag(prefix, versions, request):
+    """Слабый ``ETag`` страницы.
+
+    Страница меняется вместе с версиями областей и зависит от адреса и
+    cookie, как и её запись в кэше. Слабый — потому что CSRF-токен в
+    разметке маскируется заново при каждом рендеринге.
+    """
+    digest = hashlib.md5(':'.join([
+        prefix,
+        '.'.join(str(version) for version in versions),
+        request.get_full_path(),
+        request.META.get('HTTP_COOKIE', ''),
+    ]).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _cached_or_rendered(view, key, request, *args, **kwargs):
+    """Общая для всех посетителей страница с метками ``{% hole %}``."""
+    response = cache.get(key)
+    if response is not None:
+        return response
+    # После смены версии страницу строит один запрос, остальные
+    # дожидаются его записи в кэш.
+    with single_flight(cache, key):
+        response = cache.get(key)
+        if response is None:
+            request.punch_holes = True
+            # Запись кэша общая для всех: реплика могла ещё не получить
+            # изменение, из-за которого сменилась версия.
+            with read_from_replicas(False):
+                response = view(request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(key, response, settings.PAGE_CACHE_TIMEOUT)
+    return response
+
+
+def versioned_cache_page(get_scopes):
+    """Кэширует страницу до изменения данных её областей.
+
+    ``get_scopes(request, **kwargs)`` возвращает список областей
+    страницы или ``None``, если страницу кэшировать не нужно. Запись
+    кэша одна на адрес для всех посетителей: персональные фрагменты
+    дорисовывает ``holes.fill`` на каждый запрос. Ответ получает
+    ``ETag`` и ``Last-Modified`` из версий областей, и условный запрос
+    неизменившейся страницы получает 304 без рендеринга и без чтения
+    кэша страниц.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            scopes = get_scopes(request, **kwargs)
+            if scopes is None:
+                return view(request, *args, **kwargs)
+            versions, modified = get_state(*scopes)
+            etag = make_etag(view.__name__, versions, request)
+            # Дата не учитывает cookie: после входа браузер получил бы
+            # 304 на гостевую страницу. Поэтому она только для запросов
+            # без cookie, например от поисковых роботов.
+            last_modified = None if request.COOKIES else int(modified)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=last_modified
+            )
+            if response is None:
+                key = _make_key(
+                    view.__name__, versions, request.get_full_path()
+                )
+                response = holes.fill(request, _cached_or_rendered(
+                    view, key, request, *args, **kwargs
+                ))
+            if response.status_code in (200, 304):
+                response['ETag'] = etag
+                if last_modified is not None:
+                    response['Last-Modified'] = http_date(last_modified)
+                patch_vary_headers(response, ('Cookie',))
+                # Браузер хранит страницу, но проверяет её при каждом
+                # показе: ответ 304 дешевле, чем устаревшая лента.
+                if response.has_header('Expires'):
+                    del response['Expires']
+                patch_cache_control(response, private=True, max_age=0)
+            return response
+        return wrapper
+    return decorator
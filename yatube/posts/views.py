@@ -1,35 +1,61 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
-from django.views.decorators.cache import cache_page
+from django.utils.http import urlencode
 
+from . import exporting
+from .counters import get_counters
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post
+from .paginators import CursorPaginator, WindowedPaginator, paginate
+from .search import search_posts
+from .timeline import FollowFeed
+from .versions import (
+    GLOBAL,
+    author_scope,
+    group_scope,
+    post_scope,
+    versioned_cache_page,
+)
 
 POSTS_IN_PAGE = 10
+COMMENTS_IN_PAGE = 20
 
 User = get_user_model()
 
 
 def paginator_method(posts, request):
-    paginator = Paginator(posts, POSTS_IN_PAGE)
-    page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    return paginate(posts, request, POSTS_IN_PAGE)
 
 
-@cache_page(20, key_prefix='index_page')
+def post_detail_scopes(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author__username', 'group__slug'
+    ).first()
+    if post is None:
+        return None
+    username, slug = post
+    scopes = [post_scope(post_id), author_scope(username)]
+    if slug:
+        scopes.append(group_scope(slug))
+    return scopes
+
+
+@versioned_cache_page(lambda request: [GLOBAL])
 def index(request):
-    posts = Post.objects.all()
+    posts = Post.objects.select_related('author', 'group')
     context = {
         'page_obj': paginator_method(posts, request),
     }
     return render(request, 'posts/index.html', context)
 
 
+@versioned_cache_page(lambda request, slug: [group_scope(slug)])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.groups.all()
+    posts = group.groups.select_related('author', 'group')
     context = {
         'group': group,
         'page_obj': paginator_method(posts, request),
@@ -37,34 +63,106 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@versioned_cache_page(
+    lambda request, username: [author_scope(username)]
+)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    following = (
-        request.user.is_authenticated and Follow.objects.filter(
-            user=request.user.pk, author=author
-        ).exists()
+    author = get_object_or_404(
+        User.objects.select_related('counters'), username=username
     )
+    posts = author.posts.select_related('author', 'group')
     context = {
         'author': author,
+        'counters': get_counters(author),
         'page_obj': paginator_method(posts, request),
-        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@login_required
+def profile_export(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    format = request.GET.get('format', 'jsonl')
+    if format not in exporting.FORMATS:
+        format = 'jsonl'
+    response = StreamingHttpResponse(
+        exporting.stream(author, format),
+        content_type=exporting.CONTENT_TYPES[format],
+    )
+    response['Content-Disposition'] = (
+        f'attachment; filename="yatube-{author.pk}.{format}"'
+    )
+    return response
+
+
+@versioned_cache_page(post_detail_scopes)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__counters', 'group'),
+        pk=post_id,
+    )
     comment_form = CommentForm()
-    comments = post.comments.all()
     context = {
         'post': post,
+        'author_counters': get_counters(post.author),
         'comment_form': comment_form,
-        'comments': comments,
+        **comments_page(post),
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def _comment_key(post, comment_id):
+    """Ключ ``(created, pk)`` комментария поста из параметра запроса."""
+    if comment_id is None:
+        return None
+    try:
+        comment_id = int(comment_id)
+    except ValueError:
+        raise Http404
+    created = post.comments.filter(pk=comment_id).values_list(
+        'created', flat=True
+    ).first()
+    if created is None:
+        raise Http404
+    return created, comment_id
+
+
+def comments_page(post, after=None, before=None):
+    """Страница комментариев от новых к старым по курсору.
+
+    ``after`` и ``before`` — id комментариев, после (более ранние) или
+    до (более новые) которых нужна страница.
+    """
+    after = _comment_key(post, after)
+    before = _comment_key(post, before)
+    paginator = CursorPaginator(
+        post.comments.select_related('author'), COMMENTS_IN_PAGE
+    )
+    comments = paginator.get_key_page(after=after, before=before)
+    return {
+        'post': post,
+        'comments': comments,
+        'older_id': comments[-1].pk if paginator.next_cursor else None,
+        'newer_id': (
+            comments[0].pk
+            if before is not None and paginator.previous_cursor else None
+        ),
+    }
+
+
+@versioned_cache_page(lambda request, post_id: [post_scope(post_id)])
+def post_comments(request, post_id):
+    post = get_object_or_404(Post.objects.only('pk'), pk=post_id)
+    context = comments_page(
+        post,
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return render(request, 'posts/includes/comments.html', context)
+
+
 @login_required
 def post_create(request):
     form = PostForm(request.POST or None)
@@ -113,13 +211,27 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    posts = Post.objects.filter(author__following__user=request.user)
+    posts = FollowFeed(request.user)
     context = {
         'page_obj': paginator_method(posts, request),
     }
     return render(request, 'posts/follow.html', context)
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = search_posts(query) if query else Post.objects.none()
+    # Результаты упорядочены по релевантности, поэтому курсор по дате
+    # не подходит: листаем по номеру страницы.
+    paginator = WindowedPaginator(posts, POSTS_IN_PAGE)
+    context = {
+        'query': query,
+        'page_obj': paginator.get_page(request.GET.get('page')),
+        'paginator_query': urlencode({'q': query}) + '&',
+    }
+    return render(request, 'posts/search.html', context)
+
+
 @login_required
 def profile_follow(request, username):
     follower = User.objects.get(username=username)
@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -40,6 +41,9 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+if DEBUG:
+    MIDDLEWARE.append('core.middleware.QueryBudgetMiddleware')
+
 ROOT_URLCONF = 'yatube.urls'
 
 
@@ -70,6 +74,24 @@ DATABASES = {
     }
 }
 
+# Реплики только для чтения: пути к файлам SQLite через запятую.
+# Локально их заполняет manage.py sync_replicas.
+DATABASE_REPLICAS = []
+for number, name in enumerate(
+    filter(None, os.environ.get('YATUBE_DB_REPLICAS', '').split(',')), 1
+):
+    DATABASES[f'replica{number}'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': name,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+# Сколько секунд после записи клиент читает основную базу.
+REPLICA_STICKY_SECONDS = 10
+REPLICA_STICKY_COOKIE = 'use_primary'
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -103,7 +125,8 @@ STATIC_URL = '/static/'
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'core.mail.QueuedEmailBackend'
+QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -111,8 +134,78 @@ CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+TIMELINE_BACKFILL = 100
+FEED_PULL_THRESHOLD = 10000
+
+FOLLOW_GRAPH_MAX_AGE = 5 * 60
+FOLLOW_SUGGESTIONS = 5
+
+QUERY_BUDGET = 20
+
+PAGINATOR_COUNT_TTL = 5 * 60
+
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+POST_THUMBNAILS = [
+    ('960x339', {'crop': 'center', 'upscale': True}),
+]
+
+# Приём картинок постов: лимиты проверяются до декодирования,
+# картинка пережимается не больше чем до IMAGE_MAX_SIDE по длинной стороне.
+IMAGE_MAX_UPLOAD_SIZE = 10 * 2 ** 20
+IMAGE_MAX_PIXELS = 40_000_000
+IMAGE_MAX_SIDE = 2048
+IMAGE_JPEG_QUALITY = 85
+IMAGE_UPLOAD_WEBP = False
+IMAGE_WORKERS = 2
+
+# Задачи выполняет воркер ``manage.py run_jobs``. Для разработки без
+# воркера YATUBE_JOBS_EAGER=1 выполняет их сразу при постановке.
+JOBS_EAGER = os.environ.get('YATUBE_JOBS_EAGER') == '1'
+# Сколько задач каждой очереди может выполняться одновременно.
+JOB_QUEUES = {
+    'default': 4,
+    'thumbnails': 2,
+    'feeds': 2,
+    'email': 1,
+}
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_DELAY = 10
+JOB_RETRY_MAX_DELAY = 60 * 60
+JOB_STALE_AFTER = 10 * 60
+
+# На каждый пост приходятся ключи версии, времени изменения и карточки,
+# на каждый адрес — страница: 300 записей по умолчанию вытесняли бы
+# версии, и кэш страниц с карточками не работал бы.
 CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
     }
 }
+
+# Общий для процессов кэш: память процесса перед файловым кэшем в
+# каталоге YATUBE_SHARED_CACHE_DIR (в бою — Redis или Memcached).
+SHARED_CACHE_DIR = os.environ.get('YATUBE_SHARED_CACHE_DIR')
+if SHARED_CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.TwoTierCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'L1_MAX_ENTRIES': 2000,
+                'L1_TIMEOUT': 5,
+                'SYNC_INTERVAL': 0.5,
+                'EARLY_REFRESH_BETA': 1.0,
+            },
+        },
+        'shared': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': SHARED_CACHE_DIR,
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        },
+    }
+
+# Страницы и карточки сбрасываются по версиям в кэше. Версии в памяти
+# процесса не видят записей других процессов, поэтому без общего кэша
+# страницы и карточки живут не дольше 20 секунд, как до версий.
+PAGE_CACHE_TIMEOUT = 60 * 60 if SHARED_CACHE_DIR else 20